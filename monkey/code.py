@@ -36,6 +36,13 @@ class Opcode(Enum):
     OpClosure        = b'\x1D'
     OpCurrentClosure = b'\x1E'
 
+    # Never emitted by the compiler. The VM rewrites "OpAdd; OpPop" and friends
+    # into these so that an expression statement costs one dispatch, not two.
+    OpAddPop         = b'\x1F'
+    OpSubPop         = b'\x20'
+    OpMulPop         = b'\x21'
+    OpDivPop         = b'\x22'
+
 
 @dataclass
 class Definition:
@@ -74,6 +81,42 @@ definitions = {
     Opcode.OpGetFree:        Definition(name='OpGetFree',        operand_widths=[1]),
     Opcode.OpClosure:        Definition(name='OpClosure',        operand_widths=[2, 1]),
     Opcode.OpCurrentClosure: Definition(name='OpCurrentClosure', operand_widths=[]),
+    Opcode.OpAddPop:         Definition(name='OpAddPop',         operand_widths=[]),
+    Opcode.OpSubPop:         Definition(name='OpSubPop',         operand_widths=[]),
+    Opcode.OpMulPop:         Definition(name='OpMulPop',         operand_widths=[]),
+    Opcode.OpDivPop:         Definition(name='OpDivPop',         operand_widths=[]),
+}
+
+
+# Net effect on the stack of each opcode whose effect does not depend on its
+# operands. OpArray, OpHash, OpCall and OpClosure are handled in max_stack_depth.
+stack_effects = {
+    Opcode.OpConstant:       1,
+    Opcode.OpPop:           -1,
+    Opcode.OpAdd:           -1,
+    Opcode.OpSub:           -1,
+    Opcode.OpMul:           -1,
+    Opcode.OpDiv:           -1,
+    Opcode.OpTrue:           1,
+    Opcode.OpFalse:          1,
+    Opcode.OpEqual:         -1,
+    Opcode.OpNotEqual:      -1,
+    Opcode.OpGreaterThan:   -1,
+    Opcode.OpMinus:          0,
+    Opcode.OpBang:           0,
+    Opcode.OpJumpNotTruthy: -1,
+    Opcode.OpJump:           0,
+    Opcode.OpNull:           1,
+    Opcode.OpSetGlobal:     -1,
+    Opcode.OpGetGlobal:      1,
+    Opcode.OpIndex:         -1,
+    Opcode.OpReturnValue:   -1,
+    Opcode.OpReturn:         0,
+    Opcode.OpSetLocal:      -1,
+    Opcode.OpGetLocal:       1,
+    Opcode.OpGetBuiltin:     1,
+    Opcode.OpGetFree:        1,
+    Opcode.OpCurrentClosure: 1,
 }
 
 
@@ -85,20 +128,68 @@ def lookup(op: bytes) -> Definition:
     return defn
 
 
-def make(op: Opcode, *operands: int) -> bytes:
+def emit(buf: bytearray, op: Opcode, *operands: int) -> int:
+    """
+    Appends the encoded instruction to buf in place and returns the position it
+    starts at.
+    """
+    pos = len(buf)
     defn = definitions.get(op, None)
     if defn is None:
-        return b''
-    
-    instruction = op.value
-    for i, o in enumerate(operands):
-        width = defn.operand_widths[i]
-        if width == 1:
-            instruction += o.to_bytes(1, byteorder='big')
-        elif width == 2:
-            instruction += o.to_bytes(2, byteorder='big')
+        return pos
+
+    buf += op.value
+    for o, width in zip(operands, defn.operand_widths):
+        buf += o.to_bytes(width, byteorder='big')
+
+    return pos
+
+
+def make(op: Opcode, *operands: int) -> bytes:
+    buf = bytearray()
+    emit(buf, op, *operands)
+    return bytes(buf)
+
+
+def max_stack_depth(ins: bytes) -> int:
+    """
+    Returns the deepest the operand stack can get while running the instructions
+    as emitted by the compiler, following both sides of every jump.
+    """
+    depths = {0: 0}
+    pending = [0]
+    max_depth = 0
+
+    while pending:
+        i = pending.pop()
+        depth = depths[i]
+        while i < len(ins):
+            op = Opcode(ins[i].to_bytes(1))
+            defn = definitions[op]
+            operands, read = read_operands(defn, ins[i+1:i+1+sum(defn.operand_widths)])
+
+            if op in (Opcode.OpArray, Opcode.OpHash):
+                depth += 1 - operands[0]
+            elif op == Opcode.OpCall:
+                depth -= operands[0]
+            elif op == Opcode.OpClosure:
+                depth += 1 - operands[1]
+            else:
+                depth += stack_effects[op]
+            max_depth = max(max_depth, depth)
+
+            if op in (Opcode.OpReturnValue, Opcode.OpReturn):
+                break
+
+            if op in (Opcode.OpJump, Opcode.OpJumpNotTruthy) and operands[0] not in depths:
+                depths[operands[0]] = depth
+                pending.append(operands[0])
+            if op == Opcode.OpJump:
+                break
+
+            i += 1 + read
 
-    return instruction
+    return max_depth
 
 
 class Instructions(bytearray):
@@ -32,6 +32,13 @@ class CompilationScope:
 
 class Compiler:
     def __init__(self):
+        self.reset()
+
+    # Puts the compiler back in its just-constructed state for an unrelated
+    # program. Everything is replaced rather than cleared in place, since a
+    # Bytecode handed out earlier still refers to the old constants and
+    # instructions.
+    def reset(self) -> None:
         self.constants = []
         self.symbol_table = SymbolTable()
 
@@ -186,7 +193,7 @@ class Compiler:
                 self.emit(code.Opcode.OpSetLocal, symbol.index)
         
         elif type(node) is ast.Identifier:
-            symbol = self.symbol_table.resolve(node.value)
+            symbol = self.symbol_table.resolve_cached(node.value)
             if symbol is None:
                 return CompilerError(f'Undefined variable: {node.value}')
     
@@ -251,7 +258,12 @@ class Compiler:
             for sym in free_symbols:
                 self.load_symbol(sym)
 
-            compiled_fn = CompiledFunction(instructions, num_locals, len(node.parameters))
+            compiled_fn = CompiledFunction(
+                instructions,
+                num_locals,
+                len(node.parameters),
+                max_stack=code.max_stack_depth(instructions),
+            )
             fn_index = self.add_constant(compiled_fn)
             self.emit(code.Opcode.OpClosure, fn_index, len(free_symbols))
 
@@ -295,8 +307,7 @@ class Compiler:
         return len(self.constants) - 1
     
     def emit(self, op: code.Opcode, *operands: int) -> int:
-        ins = code.make(op, *operands)
-        pos = self.add_instruction(ins)
+        pos = code.emit(self.current_scope.instructions, op, *operands)
         self.set_last_instruction(op, pos)
         return pos
 
@@ -330,11 +341,13 @@ class Compiler:
         new_instruction = code.make(op, operand)
         self.replace_instruction(op_pos, new_instruction)
     
-    def add_instruction(self, ins: bytes) -> int:
-        idx = len(self.current_scope.instructions)
-        self.current_scope.instructions += code.Instructions(ins)
-        return idx
-        
     def bytecode(self) -> Bytecode:
         return Bytecode(self.current_scope.instructions, self.constants)
+
+    def compile_to_bytecode(self, program: ast.Program) -> tuple[Bytecode | None, CompilerError | None]:
+        # compile() followed by bytecode(), for callers that only want the result
+        if (err := self.compile(program)) is not None:
+            return None, err
+
+        return self.bytecode(), None
     
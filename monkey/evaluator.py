@@ -4,88 +4,135 @@ from monkey.object import *
 from monkey.builtins import get_builtin_by_name
 from monkey.tokens import TokenType, Token
 
+import operator as op
 from typing import Hashable
 
+
+# Integer infix operators, looked up once per expression instead of walking a
+# match on the operator string. Division truncates toward zero like Go.
+INTEGER_ARITHMETIC = {
+    '+': op.add,
+    '-': op.sub,
+    '*': op.mul,
+    '/': lambda a, b: int(a / b),
+}
+INTEGER_COMPARISONS = {
+    '>':  op.gt,
+    '<':  op.lt,
+    '==': op.eq,
+    '!=': op.ne,
+}
+
 class Evaluator:
-    def evaluate(self, node, env: Environment):
-        match type(node):
+    def __init__(self):
+        # AST node type -> handler, so evaluate() is one dict lookup instead of a
+        # walk down a match on the node type
+        self.handlers = {
             # Statements
-            case ast.Program:
-                return self.evaluate_program(node.statements, env)
-            case ast.BlockStatement:
-                return self.evaluate_block_statement(node, env)
-            case ast.LetStatement:
-                value = self.evaluate(node.value, env)
-                if is_error(value):
-                    return value
-                env.set(node.name.value, value)
-            case ast.ReturnStatement:
-                value = self.evaluate(node.return_value, env)
-                if is_error(value):
-                    return value
-                return ReturnValue(value=value)
-            case ast.ExpressionStatement:
-                return self.evaluate(node.expression, env)
-            
+            ast.Program:             self.evaluate_program_node,
+            ast.BlockStatement:      self.evaluate_block_statement,
+            ast.LetStatement:        self.evaluate_let_statement,
+            ast.ReturnStatement:     self.evaluate_return_statement,
+            ast.ExpressionStatement: self.evaluate_expression_statement,
+
             # Expressions
-            case ast.IntegerLiteral:
-                return IntegerObject(value=node.value)
-            case ast.StringLiteral:
-                return StringObject(value=node.value)
-            case ast.Boolean:
-                return self.native_bool_to_object(node.value)
-            case ast.PrefixExpression:
-                right = self.evaluate(node.right, env)
-                if is_error(right):
-                    return right 
-                return self.evaluate_prefix_expression(node.operator, right)
-            case ast.InfixExpression:
-                left = self.evaluate(node.left, env)
-                if is_error(left):
-                    return left
-                right = self.evaluate(node.right, env)
-                if is_error(right):
-                    return right
-                return self.evaluate_infix_expression(left, node.operator, right)
-            case ast.IfExpression:
-                return self.evaluate_if_expression(node, env)
-            case ast.Identifier:
-                return self.evaluate_identifier(node, env)
-            case ast.FunctionLiteral:
-                params = node.parameters
-                body   = node.body
-                return FunctionObject(params, body, env)
-            case ast.CallExpression:
-                if node.function.token_literal() == 'quote':
-                    return self.quote(node.arguments[0], env)
-                
-                fn = self.evaluate(node.function, env)
-                if is_error(fn):
-                    return fn
-
-                args = self.evaluate_expressions(node.arguments, env)
-                if len(args) == 1 and is_error(args[0]):
-                    return args[0]
-
-                return self.apply_function(fn, args)
-            case ast.ArrayLiteral:
-                elements = self.evaluate_expressions(node.elements, env)
-                if len(elements) == 1 and is_error(elements[0]):
-                    return elements[0]
-                
-                return ArrayObject(elements=elements)
-            case ast.IndexExpression:
-                left = self.evaluate(node.left, env)
-                if is_error(left):
-                    return left
-                
-                index = self.evaluate(node.index, env)
-                if is_error(index):
-                    return index
-                
-                return self.evaluate_index_expression(left, index)
-            case ast.HashLiteral:
-                return self.evaluate_hash_literal(node, env)
+            ast.IntegerLiteral:      self.evaluate_integer_literal,
+            ast.StringLiteral:       self.evaluate_string_literal,
+            ast.Boolean:             self.evaluate_boolean,
+            ast.PrefixExpression:    self.evaluate_prefix_node,
+            ast.InfixExpression:     self.evaluate_infix_node,
+            ast.IfExpression:        self.evaluate_if_expression,
+            ast.Identifier:          self.evaluate_identifier,
+            ast.FunctionLiteral:     self.evaluate_function_literal,
+            ast.CallExpression:      self.evaluate_call_expression,
+            ast.ArrayLiteral:        self.evaluate_array_literal,
+            ast.IndexExpression:     self.evaluate_index_node,
+            ast.HashLiteral:         self.evaluate_hash_literal,
+        }
+
+    def evaluate(self, node, env: Environment):
+        handler = self.handlers.get(type(node))
+        if handler is not None:
+            return handler(node, env)
+
+    def evaluate_program_node(self, node: ast.Program, env: Environment) -> Object:
+        return self.evaluate_program(node.statements, env)
+
+    def evaluate_let_statement(self, node: ast.LetStatement, env: Environment) -> Object | None:
+        value = self.evaluate(node.value, env)
+        if is_error(value):
+            return value
+        env.set(node.name.value, value)
+
+    def evaluate_return_statement(self, node: ast.ReturnStatement, env: Environment) -> Object:
+        value = self.evaluate(node.return_value, env)
+        if is_error(value):
+            return value
+        return ReturnValue(value=value)
+
+    def evaluate_expression_statement(self, node: ast.ExpressionStatement, env: Environment) -> Object:
+        return self.evaluate(node.expression, env)
+
+    def evaluate_integer_literal(self, node: ast.IntegerLiteral, env: Environment) -> IntegerObject:
+        return IntegerObject(value=node.value)
+
+    def evaluate_string_literal(self, node: ast.StringLiteral, env: Environment) -> StringObject:
+        return StringObject(value=node.value)
+
+    def evaluate_boolean(self, node: ast.Boolean, env: Environment) -> BooleanObject:
+        return self.native_bool_to_object(node.value)
+
+    def evaluate_prefix_node(self, node: ast.PrefixExpression, env: Environment) -> Object:
+        right = self.evaluate(node.right, env)
+        if is_error(right):
+            return right 
+        return self.evaluate_prefix_expression(node.operator, right)
+
+    def evaluate_infix_node(self, node: ast.InfixExpression, env: Environment) -> Object:
+        left = self.evaluate(node.left, env)
+        if is_error(left):
+            return left
+        right = self.evaluate(node.right, env)
+        if is_error(right):
+            return right
+        return self.evaluate_infix_expression(left, node.operator, right)
+
+    def evaluate_function_literal(self, node: ast.FunctionLiteral, env: Environment) -> FunctionObject:
+        params = node.parameters
+        body   = node.body
+        return FunctionObject(params, body, env)
+
+    def evaluate_call_expression(self, node: ast.CallExpression, env: Environment) -> Object:
+        if node.function.token_literal() == 'quote':
+            return self.quote(node.arguments[0], env)
+        
+        fn = self.evaluate(node.function, env)
+        if is_error(fn):
+            return fn
+
+        args = self.evaluate_expressions(node.arguments, env)
+        if len(args) == 1 and is_error(args[0]):
+            return args[0]
+
+        return self.apply_function(fn, args)
+
+    def evaluate_array_literal(self, node: ast.ArrayLiteral, env: Environment) -> Object:
+        elements = self.evaluate_expressions(node.elements, env)
+        if len(elements) == 1 and is_error(elements[0]):
+            return elements[0]
+        
+        return ArrayObject(elements=elements)
+
+    def evaluate_index_node(self, node: ast.IndexExpression, env: Environment) -> Object:
+        left = self.evaluate(node.left, env)
+        if is_error(left):
+            return left
+        
+        index = self.evaluate(node.index, env)
+        if is_error(index):
+            return index
+        
+        return self.evaluate_index_expression(left, index)
                 
     def evaluate_program(self, statements: list[ast.Statement], env: Environment) -> Object:
         for stmt in statements:
@@ -159,25 +206,12 @@ class Evaluator:
             return new_error(message=f'unknown operator: {left.objtype().value} {operator} {right.objtype().value}')
 
     def evaluate_integer_infix_expression(self, left: Object, operator: str, right: Object) -> Object:
-        match operator:
-            case '+':
-                return IntegerObject(left.value + right.value)
-            case '-':
-                return IntegerObject(left.value - right.value)
-            case '*':
-                return IntegerObject(left.value * right.value)
-            case '/':
-                return IntegerObject(int(left.value / right.value))
-            case '>':
-                return self.native_bool_to_object(left.value > right.value)
-            case '<':
-                return self.native_bool_to_object(left.value < right.value)
-            case '==':
-                return self.native_bool_to_object(left.value == right.value)
-            case '!=':
-                return self.native_bool_to_object(left.value != right.value)
-            case _:
-                return new_error(message=f'unknown operator: {left.objtype().value} {operator} {right.objtype().value}')
+        if (fn := INTEGER_ARITHMETIC.get(operator)) is not None:
+            return IntegerObject(fn(left.value, right.value))
+        if (fn := INTEGER_COMPARISONS.get(operator)) is not None:
+            return self.native_bool_to_object(fn(left.value, right.value))
+        
+        return new_error(message=f'unknown operator: {left.objtype().value} {operator} {right.objtype().value}')
 
     def evaluate_string_infix_expression(self, left: Object, operator: str, right: Object) -> Object:
         if operator != '+':
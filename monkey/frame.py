@@ -4,6 +4,7 @@ from monkey.object import *
 class Frame:
     def __init__(self, cl: ClosureObject, base_pointer: int):
         self.cl = cl
+        # Index into decoded, not a byte offset into instructions
         self.ip = -1
         self.base_pointer = base_pointer
     
@@ -23,7 +23,7 @@ class ObjectType(Enum):
 
 
 
-@dataclass
+@dataclass(slots=True)
 class Object:
     @abstractmethod
     def objtype(self) -> ObjectType:
@@ -34,7 +34,7 @@ class Object:
         raise NotImplementedError
 
 
-@dataclass
+@dataclass(slots=True)
 class IntegerObject(Object):
     value: int
 
@@ -48,7 +48,7 @@ class IntegerObject(Object):
         return hash(self.value)
 
 
-@dataclass
+@dataclass(slots=True)
 class StringObject(Object):
     value: str
 
@@ -62,7 +62,7 @@ class StringObject(Object):
         return hash(self.value)
 
 
-@dataclass
+@dataclass(slots=True)
 class BooleanObject(Object):
     value: bool
 
@@ -76,7 +76,7 @@ class BooleanObject(Object):
         return hash(self.value)
 
 
-@dataclass
+@dataclass(slots=True)
 class ReturnValue(Object):
     value: Object
 
@@ -87,7 +87,7 @@ class ReturnValue(Object):
         return self.value.inspect()
 
 
-@dataclass
+@dataclass(slots=True)
 class FunctionObject(Object):
     parameters: list[ast.Identifier]
     body: ast.BlockStatement
@@ -101,11 +101,21 @@ class FunctionObject(Object):
         return f'fn({params}) ' + '{' + f'\n{self.body}\n' + '}'
 
 
-@dataclass
+@dataclass(slots=True)
 class CompiledFunction(Object):
     instructions: code.Instructions
     num_locals: int = 0
     num_parameters: int = 0
+    # Deepest the operand stack gets while running the function, on top of its
+    # locals. Lets the VM check for stack overflow once per call.
+    max_stack: int = field(default=0, compare=False)
+    # The instructions as the VM runs them, one (op, operand, operand) tuple per
+    # instruction. Only the VM fills this in.
+    decoded: list = field(default=None, repr=False, compare=False)
+    # Inline cache for the OpCall sites in this function, indexed by the position
+    # of the OpCall in decoded. Only the VM touches it, it's allocated when the
+    # VM loads the function.
+    call_cache: list = field(default=None, repr=False, compare=False)
 
     def objtype(self):
         return ObjectType.COMPILED_FUNCTION_OBJ
@@ -114,7 +124,7 @@ class CompiledFunction(Object):
         return f'CompiledFunction[{id(self)}]'
 
 
-@dataclass
+@dataclass(slots=True)
 class ClosureObject(Object):
     fn: CompiledFunction
     free: List[Object] = field(default_factory=list) 
@@ -126,7 +136,7 @@ class ClosureObject(Object):
         return f'Closure[{id(self.fn)}, {len(self.free)}]'
 
 
-@dataclass
+@dataclass(slots=True)
 class ArrayObject(Object):
     # We use a python tuple because monkey arrays are immutable
     # and can hold multiple data types at once
@@ -140,19 +150,33 @@ class ArrayObject(Object):
         return f'[{elements}]' 
 
 
-@dataclass
+@dataclass(slots=True)
 class HashObject(Object):
-    pairs: dict[Object, Object]
+    # The VM keys pairs by hash_key(), so integer and string keys are stored
+    # as plain python values there
+    pairs: dict[Any, Object]
 
     def objtype(self):
         return ObjectType.HASH_OBJ
     
     def inspect(self):
-        pairs = ', '.join([f'{k.inspect()}:{v.inspect()}' for k, v in self.pairs.items()])
+        pairs = ', '.join([f'{k.inspect() if isinstance(k, Object) else k}:{v.inspect()}' for k, v in self.pairs.items()])
         return '{' + pairs + '}'
 
 
-@dataclass
+def hash_key(obj: Object) -> Any:
+    """
+    Returns the dict key for obj. Integers and strings are unboxed so lookups use
+    python's own hashing and equality instead of the dataclass dunders. Booleans
+    stay boxed, otherwise true and 1 would be the same key.
+    """
+    if type(obj) is IntegerObject or type(obj) is StringObject:
+        return obj.value
+    
+    return obj
+
+
+@dataclass(slots=True)
 class BuiltinObject(Object):
     fn: Callable
 
@@ -163,7 +187,7 @@ class BuiltinObject(Object):
         return 'builtin function'
 
 
-@dataclass
+@dataclass(slots=True)
 class QuoteObject(Object):
     node: ast.Node
 
@@ -174,7 +198,7 @@ class QuoteObject(Object):
         return f'QUOTE({self.node})'
 
         
-@dataclass
+@dataclass(slots=True)
 class NullObject(Object):
     def objtype(self):
         return ObjectType.NULL_OBJ
@@ -183,7 +207,7 @@ class NullObject(Object):
         return 'null'
 
 
-@dataclass
+@dataclass(slots=True)
 class ErrorObject(Object):
     message: str
 
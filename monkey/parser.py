@@ -35,15 +35,13 @@ class InfixParseFn:
 
 
 class Parser:
+    # Fixed attribute set, so the parser's many self.curr_token/peek_token reads
+    # go through slot descriptors instead of an instance dict
+    __slots__ = ('depth', 'verbose', 'tokens', 'lexer', 'curr_token', 'peek_token',
+                 'errors', 'operator_precedences', 'prefix_parse_fns', 'infix_parse_fns')
+
     def __init__(self, lexer):
-        self.depth = 0
         self.verbose = False
-        self.tokens = []
-
-        self.lexer: Lexer = lexer
-        self.curr_token: Token = None
-        self.peek_token: Token = None
-        self.errors: List[str] = []
 
         self.operator_precedences = {
             TokenType.EQ:       Precedence.EQUALS,
@@ -84,6 +82,20 @@ class Parser:
         self.register_infix(TokenType.LPAREN,    self.parse_call_expression)
         self.register_infix(TokenType.LBRACKET,  self.parse_index_expression)
 
+        self.reset(lexer)
+
+    # Points the parser at a new lexer and clears what the last parse left
+    # behind. The precedence and parse fn tables are kept, so one parser can be
+    # reused for many inputs.
+    def reset(self, lexer):
+        self.depth = 0
+        self.tokens = []
+
+        self.lexer: Lexer = lexer
+        self.curr_token: Token = None
+        self.peek_token: Token = None
+        self.errors: List[str] = []
+
         self.next_token()
         self.next_token()
 
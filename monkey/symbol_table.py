@@ -23,8 +23,12 @@ class SymbolTable:
         self.store = {}
         self.num_definitions = 0
         self.free_symbols = []
+        # Successful resolve() results by name, for resolve_cached. Defining a
+        # name on this table drops its entry.
+        self._resolve_cache = {}
 
     def define(self, name: str) -> Symbol:
+        self._resolve_cache.pop(name, None)
         scope = GlobalScope if self.outer is None else LocalScope
         symbol = Symbol(name, scope, self.num_definitions)
         self.store[name] = symbol
@@ -32,17 +36,20 @@ class SymbolTable:
         return symbol
 
     def define_builtin(self, index: int, name: str) -> Symbol:
+        self._resolve_cache.pop(name, None)
         symbol = Symbol(name, BuiltinScope, index)
         self.store[name] = symbol
         return symbol
 
     def define_free(self, original: Symbol) -> Symbol:
+        self._resolve_cache.pop(original.name, None)
         self.free_symbols.append(original)
         symbol = Symbol(name=original.name, scope=FreeScope, index=len(self.free_symbols)-1)
         self.store[original.name] = symbol
         return symbol 
 
     def define_function_name(self, name: str) -> Symbol:
+        self._resolve_cache.pop(name, None)
         symbol = Symbol(name, FunctionScope, index=0)
         self.store[name] = symbol
         return symbol
@@ -64,3 +71,19 @@ class SymbolTable:
             return free
         
         return None
+
+    def resolve_cached(self, name: str) -> Symbol | None:
+        '''
+        Same as resolve, but remembers what a name resolved to on this table so
+        repeated lookups of an outer name skip the walk through the outer tables.
+        Misses aren't cached, since the name may still be defined later. Outer
+        tables must not gain definitions while this one is in use, which holds
+        for the compiler: a function's scope is done before its outer continues.
+        '''
+        symbol = self._resolve_cache.get(name)
+        if symbol is None:
+            symbol = self.resolve(name)
+            if symbol is not None:
+                self._resolve_cache[name] = symbol
+
+        return symbol
@@ -66,6 +66,8 @@ def lookup_identifier(identifier_literal: str) -> TokenType:
 
 
 class Token:
+    __slots__ = ('type', 'literal')
+
     def __init__(self, tok_type: TokenType, tok_literal: str):
         self.type = tok_type
         self.literal = tok_literal
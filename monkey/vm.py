@@ -1,9 +1,11 @@
+from monkey import code
 from monkey.code import Opcode
 from monkey.compiler import Bytecode
 from monkey.object import *
 from monkey.frame import Frame
 from monkey.builtins import builtins
 
+from dataclasses import replace
 from typing import List
 
 
@@ -11,9 +13,113 @@ STACK_SIZE = 2048
 GLOBALS_SIZE = 65536
 MAX_FRAMES = 1024
 
-TRUE = BooleanObject(True)
-FALSE = BooleanObject(False)
-NULL = NullObject()
+# Raw opcode bytes, so run() can compare the int it reads straight out of the
+# instructions instead of building an Opcode for every instruction
+OP_CONSTANT        = Opcode.OpConstant.value[0]
+OP_POP             = Opcode.OpPop.value[0]
+OP_ADD             = Opcode.OpAdd.value[0]
+OP_SUB             = Opcode.OpSub.value[0]
+OP_MUL             = Opcode.OpMul.value[0]
+OP_DIV             = Opcode.OpDiv.value[0]
+OP_TRUE            = Opcode.OpTrue.value[0]
+OP_FALSE           = Opcode.OpFalse.value[0]
+OP_EQUAL           = Opcode.OpEqual.value[0]
+OP_NOT_EQUAL       = Opcode.OpNotEqual.value[0]
+OP_GREATER_THAN    = Opcode.OpGreaterThan.value[0]
+OP_MINUS           = Opcode.OpMinus.value[0]
+OP_BANG            = Opcode.OpBang.value[0]
+OP_JUMP_NOT_TRUTHY = Opcode.OpJumpNotTruthy.value[0]
+OP_JUMP            = Opcode.OpJump.value[0]
+OP_NULL            = Opcode.OpNull.value[0]
+OP_SET_GLOBAL      = Opcode.OpSetGlobal.value[0]
+OP_GET_GLOBAL      = Opcode.OpGetGlobal.value[0]
+OP_ARRAY           = Opcode.OpArray.value[0]
+OP_HASH            = Opcode.OpHash.value[0]
+OP_INDEX           = Opcode.OpIndex.value[0]
+OP_CALL            = Opcode.OpCall.value[0]
+OP_RETURN_VALUE    = Opcode.OpReturnValue.value[0]
+OP_RETURN          = Opcode.OpReturn.value[0]
+OP_SET_LOCAL       = Opcode.OpSetLocal.value[0]
+OP_GET_LOCAL       = Opcode.OpGetLocal.value[0]
+OP_GET_BUILTIN     = Opcode.OpGetBuiltin.value[0]
+OP_GET_FREE        = Opcode.OpGetFree.value[0]
+OP_CLOSURE         = Opcode.OpClosure.value[0]
+OP_CURRENT_CLOSURE = Opcode.OpCurrentClosure.value[0]
+OP_ADD_POP         = Opcode.OpAddPop.value[0]
+OP_SUB_POP         = Opcode.OpSubPop.value[0]
+OP_MUL_POP         = Opcode.OpMulPop.value[0]
+OP_DIV_POP         = Opcode.OpDivPop.value[0]
+
+# Looked up once per operand pair in the arithmetic and comparison helpers
+_INT_T = IntegerObject
+_STR_T = StringObject
+
+# Producers that fuse_pops may merge with an OpPop that directly follows them
+POP_FUSED = {
+    OP_ADD: OP_ADD_POP,
+    OP_SUB: OP_SUB_POP,
+    OP_MUL: OP_MUL_POP,
+    OP_DIV: OP_DIV_POP,
+}
+POP_UNFUSED = {fused: op for op, fused in POP_FUSED.items()}
+
+
+def fuse_pops(instructions: code.Instructions) -> code.Instructions:
+    '''
+    Returns a copy of instructions where every fusable producer that is directly
+    followed by an OpPop is swapped for its *Pop variant. The OpPop itself stays
+    in place, since a jump may land on it; the fused instruction just steps over
+    it, so no jump targets move.
+    '''
+    fused = code.Instructions(instructions)
+
+    i = 0
+    while i < len(fused):
+        defn = code.lookup(fused[i].to_bytes(1))
+        next_i = i + 1 + sum(defn.operand_widths)
+        if fused[i] in POP_FUSED and next_i < len(fused) and fused[next_i] == OP_POP:
+            fused[i] = POP_FUSED[fused[i]]
+        i = next_i
+
+    return fused
+
+
+def decode(instructions: code.Instructions) -> list[tuple[int, int, int]]:
+    '''
+    Decodes instructions into one (op, operand, operand) tuple per instruction so
+    that run() never reads operands out of the bytes itself. Missing operands are
+    0, and jump targets are rewritten from byte offsets to indexes into the list.
+    '''
+    decoded = []
+    byte_to_pc = {}
+
+    i = 0
+    while i < len(instructions):
+        byte_to_pc[i] = len(decoded)
+        defn = code.lookup(instructions[i].to_bytes(1))
+        # Only the operand bytes are sliced, copying the rest of the stream per
+        # instruction would make decoding quadratic
+        operands, read = code.read_operands(defn, instructions[i+1:i+1+sum(defn.operand_widths)])
+        operands += [0] * (2 - len(operands))
+        decoded.append((instructions[i], *operands))
+        i += 1 + read
+    byte_to_pc[i] = len(decoded)
+
+    return [
+        (op, byte_to_pc[a], b) if op in (OP_JUMP, OP_JUMP_NOT_TRUTHY) else (op, a, b)
+        for op, a, b in decoded
+    ]
+
+
+def load_function(fn: CompiledFunction) -> CompiledFunction:
+    '''
+    Returns a copy of fn ready for the VM to run. The stack overflow check on
+    entering a function trusts max_stack, so it's computed here for functions that
+    didn't come from the compiler and so have it unset.
+    '''
+    max_stack = fn.max_stack or code.max_stack_depth(fn.instructions)
+    decoded = decode(fuse_pops(fn.instructions))
+    return replace(fn, max_stack=max_stack, decoded=decoded, call_cache=[None] * len(decoded))
 
 
 class VmError(Exception):
@@ -21,123 +127,132 @@ class VmError(Exception):
 
 class VirtualMachine:
     def __init__(self, bytecode: Bytecode):
-        self.constants = bytecode.constants
         self.globals = [None] * GLOBALS_SIZE
         self.stack = [None] * STACK_SIZE
+        self.frames = [None] * MAX_FRAMES
+        self.reset(bytecode)
+
+    def reset(self, bytecode: Bytecode) -> None:
+        '''
+        Loads new bytecode into the machine, keeping the stack, globals and frame
+        arrays already allocated. Globals are cleared, since a global defined in a
+        branch that never ran would otherwise read the previous program's value.
+        '''
+        self.globals[:] = [None] * GLOBALS_SIZE
+        self.constants = [
+            load_function(c) if type(c) is CompiledFunction else c
+            for c in bytecode.constants
+        ]
         # Always points to the next value. Top of stack is stack[sp-1]
         self.sp = 0
 
-        self.frames = [None] * MAX_FRAMES
-        main_fn = CompiledFunction(instructions=bytecode.instructions)
+        main_fn = CompiledFunction(
+            instructions=bytecode.instructions,
+            max_stack=code.max_stack_depth(bytecode.instructions),
+            decoded=decode(fuse_pops(bytecode.instructions)),
+        )
+        main_fn.call_cache = [None] * len(main_fn.decoded)
         main_closure = ClosureObject(fn=main_fn)
         main_frame = Frame(cl=main_closure, base_pointer=0)
         self.frames[0] = main_frame
         self.frames_index = 1
 
     def run(self) -> VmError | None:
-        while self.current_frame.ip < len(self.current_frame.instructions) - 1:
-            self.current_frame.ip += 1
+        # Everything the loop touches on every instruction lives in locals. The
+        # frame, its decoded instructions and ip are reloaded whenever a call or
+        # return switches frames, and ip is written back to the frame before one.
+        frame = self.frames[self.frames_index - 1]
+        if frame.cl.fn.max_stack > STACK_SIZE:
+            return VmError('stack overflow')
 
-            ip = self.current_frame.ip
-            ins = self.current_frame.instructions
-            op = Opcode(ins[ip].to_bytes(1))
+        decoded = frame.cl.fn.decoded
+        ip = frame.ip
+        stack = self.stack
+        constants = self.constants
+        globals_ = self.globals
 
-            if op == Opcode.OpConstant:
-                const_index = int.from_bytes(ins[ip+1:ip+3], 'big')
-                self.current_frame.ip += 2
+        while ip < len(decoded) - 1:
+            ip += 1
+            op, a, b = decoded[ip]
 
-                err = self.push(self.constants[const_index])
-                if err is not None:
-                    return err
+            if op == OP_CONSTANT:
+                stack[self.sp] = constants[a]
+                self.sp += 1
             
-            elif op == Opcode.OpTrue:
-                err = self.push(TRUE)
-                if err is not None:
-                    return err
+            elif op == OP_TRUE:
+                stack[self.sp] = TRUE
+                self.sp += 1
             
-            elif op == Opcode.OpFalse:
-                err = self.push(FALSE)
-                if err is not None:
-                    return err
+            elif op == OP_FALSE:
+                stack[self.sp] = FALSE
+                self.sp += 1
             
-            elif op == Opcode.OpPop:
-                self.pop()
+            elif op == OP_POP:
+                self.sp -= 1
             
-            elif op in [Opcode.OpAdd, Opcode.OpSub, Opcode.OpMul, Opcode.OpDiv]:
+            elif op in (OP_ADD, OP_SUB, OP_MUL, OP_DIV):
                 err = self.execute_binary_operation(op)
                 if err is not None:
                     return err
             
-            elif op in [Opcode.OpEqual, Opcode.OpNotEqual, Opcode.OpGreaterThan]:
+            elif op in (OP_ADD_POP, OP_SUB_POP, OP_MUL_POP, OP_DIV_POP):
+                err = self.execute_binary_operation(POP_UNFUSED[op])
+                if err is not None:
+                    return err
+
+                # Pop the result and step over the OpPop that followed
+                self.sp -= 1
+                ip += 1
+
+            elif op in (OP_EQUAL, OP_NOT_EQUAL, OP_GREATER_THAN):
                 err = self.execute_comparison(op)
                 if err is not None:
                     return err
             
-            elif op == Opcode.OpBang:
+            elif op == OP_BANG:
                 err = self.execute_bang_operator()
                 if err is not None:
                     return err
             
-            elif op == Opcode.OpMinus:
+            elif op == OP_MINUS:
                 err = self.execute_minus_operator()
                 if err is not None:
                     return err
             
-            elif op == Opcode.OpJump:
-                pos = int.from_bytes(ins[ip+1:ip+3])
-                self.current_frame.ip = pos - 1
+            elif op == OP_JUMP:
+                ip = a - 1
             
-            elif op == Opcode.OpJumpNotTruthy:
-                pos = int.from_bytes(ins[ip+1:ip+3])
-                self.current_frame.ip += 2
-
-                condition = self.pop()
-                if not self.is_truthy(condition):
-                    self.current_frame.ip = pos - 1
+            elif op == OP_JUMP_NOT_TRUTHY:
+                self.sp -= 1
+                condition = stack[self.sp]
+                if condition is FALSE or condition is NULL:
+                    ip = a - 1
             
-            elif op == Opcode.OpNull:
-                err = self.push(NULL)
-                if err is not None:
-                    return err
-        
+            elif op == OP_NULL:
+                stack[self.sp] = NULL
+                self.sp += 1
             
-            elif op == Opcode.OpSetGlobal:
-                global_index = int.from_bytes(ins[ip+1:ip+3])
-                self.current_frame.ip += 2
-
-                self.globals[global_index] = self.pop()
+            elif op == OP_SET_GLOBAL:
+                self.sp -= 1
+                globals_[a] = stack[self.sp]
             
-            elif op == Opcode.OpGetGlobal:
-                global_index = int.from_bytes(ins[ip+1:ip+3])
-                self.current_frame.ip += 2
-
-                err = self.push(self.globals[global_index])
-                if err is not None:
-                    return err
+            elif op == OP_GET_GLOBAL:
+                stack[self.sp] = globals_[a]
+                self.sp += 1
             
-            elif op == Opcode.OpArray:
-                num_elements = int.from_bytes(ins[ip+1:ip+3])
-                self.current_frame.ip += 2
-
-                array = self.build_array(self.sp - num_elements, self.sp)
-                self.sp -= num_elements
+            elif op == OP_ARRAY:
+                array = self.build_array(self.sp - a, self.sp)
+                self.sp -= a
 
-                err = self.push(array)
-                if err is not None:
-                    return err
+                self.push(array)
             
-            elif op == Opcode.OpHash:
-                num_elements = int.from_bytes(ins[ip+1:ip+3])
-                self.current_frame.ip += 2
+            elif op == OP_HASH:
+                hash_map = self.build_hash(self.sp - a, self.sp)
+                self.sp -= a
 
-                hash_map = self.build_hash(self.sp - num_elements, self.sp)
-                self.sp -= num_elements
+                self.push(hash_map)
 
-                err = self.push(hash_map)
-                if err is not None:
-                    return err
-
-            elif op == Opcode.OpIndex:
+            elif op == OP_INDEX:
                 index = self.pop()
                 left = self.pop()
 
@@ -145,90 +260,80 @@ class VirtualMachine:
                 if err is not None:
                     return err
 
-            elif op == Opcode.OpCall:
-                num_args = int(ins[ip+1])
-                self.current_frame.ip += 1
-
-                err = self.execute_call(num_args)
+            elif op == OP_CALL:
+                num_args = a
+                frame.ip = ip
+
+                # A cache hit means this exact closure already passed the type
+                # and argument count checks at this site, so only the frame
+                # setup is left to do
+                callee = stack[self.sp-1-num_args]
+                cached = frame.cl.fn.call_cache[ip]
+                if cached is not None and cached[0] is callee:
+                    err = self.call_closure_fast(callee, num_args, cached[1])
+                else:
+                    err = self.execute_call(num_args, ip)
                 if err is not None:
                     return err
+
+                # Builtins run in place and leave the frame as it was
+                frame = self.frames[self.frames_index - 1]
+                decoded = frame.cl.fn.decoded
+                ip = frame.ip
             
-            elif op == Opcode.OpReturnValue:
-                return_value = self.pop()
+            elif op == OP_RETURN_VALUE:
+                return_value = stack[self.sp - 1]
 
-                frame = self.pop_frame()
+                self.frames_index -= 1
                 self.sp = frame.base_pointer - 1
 
-                err = self.push(return_value)
-                if err is not None:
-                    return err
+                stack[self.sp] = return_value
+                self.sp += 1
 
-            elif op == Opcode.OpReturn:
-                frame = self.pop_frame()
-                self.sp = frame.base_pointer - 1
+                frame = self.frames[self.frames_index - 1]
+                decoded = frame.cl.fn.decoded
+                ip = frame.ip
 
-                err = self.push(NULL)
-                if err is not None:
-                    return err
-            
-            elif op == Opcode.OpSetLocal:
-                local_index = code.read_uint8(ins[ip+1:ip+2])
-                self.current_frame.ip += 1
+            elif op == OP_RETURN:
+                self.frames_index -= 1
+                self.sp = frame.base_pointer - 1
 
-                frame = self.current_frame
+                stack[self.sp] = NULL
+                self.sp += 1
 
-                self.stack[frame.base_pointer + local_index] = self.pop()
+                frame = self.frames[self.frames_index - 1]
+                decoded = frame.cl.fn.decoded
+                ip = frame.ip
             
-            elif op == Opcode.OpGetLocal:
-                local_index = code.read_uint8(ins[ip+1:ip+2])
-                self.current_frame.ip += 1
-
-                frame = self.current_frame
-
-                err = self.push(self.stack[frame.base_pointer + local_index])
-                if err is not None:
-                    return err
+            elif op == OP_SET_LOCAL:
+                self.sp -= 1
+                stack[frame.base_pointer + a] = stack[self.sp]
             
-            elif op == Opcode.OpGetBuiltin:
-                builtin_index = code.read_uint8(ins[ip+1:ip+2])
-                self.current_frame.ip += 1
-
-                definition = builtins[builtin_index]
-
-                err = self.push(definition.builtin)
-                if err is not None:
-                    return err
+            elif op == OP_GET_LOCAL:
+                stack[self.sp] = stack[frame.base_pointer + a]
+                self.sp += 1
             
-            elif op == Opcode.OpGetFree:
-                free_index = code.read_uint8(ins[ip+1:ip+2])
-                self.current_frame.ip += 1
-
-                current_closure = self.current_frame.cl
-                err = self.push(current_closure.free[free_index])
-                if err is not None:
-                    return err  
+            elif op == OP_GET_BUILTIN:
+                stack[self.sp] = builtins[a].builtin
+                self.sp += 1
             
-            elif op == Opcode.OpClosure:
-                const_index = code.read_uint16(ins[ip+1:ip+3])
-                num_free = code.read_uint8([ins[ip+3]])
-                self.current_frame.ip += 3
-
-                err = self.push_closure(const_index, num_free)
+            elif op == OP_GET_FREE:
+                stack[self.sp] = frame.cl.free[a]
+                self.sp += 1
+            
+            elif op == OP_CLOSURE:
+                err = self.push_closure(a, b)
                 if err is not None:
                     return err
             
             # If we get this from the compiler, it means the current function has called
             # itself. We put the function back on the stack, then any arguments will be
             # put on the stack, then OpCall will be executed.
-            elif op == Opcode.OpCurrentClosure:
-                current_closure = self.current_frame.cl
-                err = self.push(current_closure)
-                if err is not None:
-                    return err
+            elif op == OP_CURRENT_CLOSURE:
+                stack[self.sp] = frame.cl
+                self.sp += 1
 
-    @property
-    def current_frame(self) -> Frame:
-        return self.frames[self.frames_index - 1]
+        frame.ip = ip
 
     def push_frame(self, f: Frame) -> None:
         self.frames[self.frames_index] = f
@@ -267,70 +372,72 @@ class VirtualMachine:
         return self.push(array.elements[i])
     
     def execute_hash_index(self, hash_map: Object, key: Object) -> VmError | None:
-        return self.push(hash_map.pairs.get(key, NULL))
+        return self.push(hash_map.pairs.get(hash_key(key), NULL))
 
-    def execute_binary_operation(self, op: Opcode) -> VmError | None:
+    def execute_binary_operation(self, op: int) -> VmError | None:
         right = self.pop()
         left = self.pop()
 
-        if type(left) is IntegerObject and type(right) is IntegerObject:
+        tl = type(left)
+        tr = type(right)
+        if tl is _INT_T and tr is _INT_T:
             return self.execute_binary_integer_operation(op, left, right)
-        elif type(left) is StringObject and type(right) is StringObject:
+        elif tl is _STR_T and tr is _STR_T:
             return self.execute_binary_string_operation(op, left, right)
         
         return VmError(f'unsupported types for binary operation: {left.type()}, {right.type()}')
 
-    def execute_binary_integer_operation(self, op: Opcode, left: IntegerObject, right: IntegerObject) -> VmError | None:
+    def execute_binary_integer_operation(self, op: int, left: IntegerObject, right: IntegerObject) -> VmError | None:
         left_val = left.value
         right_val = right.value
 
-        if op == Opcode.OpAdd:
+        if op == OP_ADD:
             result = left_val + right_val
-        elif op == Opcode.OpSub:
+        elif op == OP_SUB:
             result = left_val - right_val
-        elif op == Opcode.OpMul:
+        elif op == OP_MUL:
             result = left_val * right_val
-        elif op == Opcode.OpDiv:
+        elif op == OP_DIV:
             result = left_val // right_val
         else:
             return VmError(f'unknown integer operator: {op}')
         
         return self.push(IntegerObject(result))
     
-    def execute_binary_string_operation(self, op: Opcode, left: StringObject, right: StringObject) -> VmError | None:
+    def execute_binary_string_operation(self, op: int, left: StringObject, right: StringObject) -> VmError | None:
         left_val = left.value
         right_val = right.value
 
-        if op == Opcode.OpAdd:
+        if op == OP_ADD:
             result = left_val + right_val
         else:
             return VmError(f'unknown string operator: {op}')
         
         return self.push(StringObject(result))
     
-    def execute_comparison(self, op: Opcode) -> VmError | None:
+    def execute_comparison(self, op: int) -> VmError | None:
         right = self.pop()
         left = self.pop()
 
-        if type(left) == IntegerObject and type(right) == IntegerObject:
+        if type(left) is _INT_T and type(right) is _INT_T:
             return self.execute_integer_comparison(op, left, right)
 
-        if op == Opcode.OpEqual:
+        if op == OP_EQUAL:
             return self.push(self.native_bool_to_boolean_object(left == right))
-        elif op == Opcode.OpNotEqual:
+        elif op == OP_NOT_EQUAL:
             return self.push(self.native_bool_to_boolean_object(left != right))
         else:
             return VmError(f'unknown boolean comparison operator: {op}')
             
-    def execute_integer_comparison(self, op: Opcode, left: IntegerObject, right: IntegerObject) -> VmError | None:
+    def execute_integer_comparison(self, op: int, left: IntegerObject, right: IntegerObject) -> VmError | None:
         left_val = left.value
         right_val = right.value
 
-        if op == Opcode.OpEqual:
+        if op == OP_EQUAL:
             return self.push(self.native_bool_to_boolean_object(left_val == right_val))
-        elif op == Opcode.OpNotEqual:
+        elif op == OP_NOT_EQUAL:
             return self.push(self.native_bool_to_boolean_object(left_val != right_val))
-        elif op == Opcode.OpGreaterThan:
+        elif op == OP_GREATER_THAN:
             return self.push(self.native_bool_to_boolean_object(left_val >  right_val))
         else:
             return VmError(f'unknown integer comparison operator: {op}')
@@ -343,11 +450,8 @@ class VirtualMachine:
     def execute_bang_operator(self) -> VmError | None:
         operand = self.pop()
 
-        if operand == TRUE:
-            return self.push(FALSE)
-        elif operand == FALSE:
-            return self.push(TRUE)
-        elif operand == NULL:
+        # TRUE, FALSE and NULL are singletons, so identity is enough here
+        if operand is FALSE or operand is NULL:
             return self.push(TRUE)
         else:
             return self.push(FALSE)
@@ -355,33 +459,51 @@ class VirtualMachine:
     def execute_minus_operator(self) -> VmError | None:
         operand = self.pop()
 
-        if type(operand) != IntegerObject:
+        if type(operand) is not _INT_T:
             return VmError(f'unsupported type for negation: {operand.type()}')
         
         return self.push(IntegerObject(-operand.value))
     
-    def execute_call(self, num_args: int) -> VmError | None:
+    def execute_call(self, num_args: int, ip: int) -> VmError | None:
         callee = self.stack[self.sp-1-num_args] # Closure/builtin is below all the args on the stack
         if type(callee) == ClosureObject:
-            return self.call_closure(callee, num_args)
+            return self.call_closure(callee, num_args, ip)
         elif type(callee) == BuiltinObject:
             return self.call_builtin(callee, num_args)
         else:
             return VmError('calling non-closure and non-builtin')
 
-    def call_closure(self, cl: ClosureObject, num_args: int) -> VmError | None:      
-        if num_args != cl.fn.num_parameters:
-            return VmError(f'wrong number of arguments: want={cl.fn.num_parameters}, got={num_args}')
-        
+    def call_closure(self, cl: ClosureObject, num_args: int, ip: int) -> VmError | None:
+        fn = cl.fn
+        if num_args != fn.num_parameters:
+            return VmError(f'wrong number of arguments: want={fn.num_parameters}, got={num_args}')
+
+        # The closure called from a given call site is almost always the same one
+        # (recursion being the extreme case), so each OpCall remembers the last
+        # closure it successfully called. The cache belongs to the caller, the
+        # function in the current frame, and ip is the OpCall's index into its
+        # decoded instructions. Only closures that passed the checks above are
+        # cached; a different closure at the site just overwrites the slot.
+        self.frames[self.frames_index - 1].cl.fn.call_cache[ip] = (cl, fn.num_locals)
+
+        return self.call_closure_fast(cl, num_args, fn.num_locals)
+
+    def call_closure_fast(self, cl: ClosureObject, num_args: int, num_locals: int) -> VmError | None:
         # self.sp points at the slot above the args, but base_pointer needs to point
         # to the first arg so that it can appropriately clean them up when the call
         # is finished
-        frame = Frame(cl, base_pointer=self.sp-num_args)
+        base_pointer = self.sp - num_args
+        # The only stack overflow check: the locals plus the deepest the function's
+        # own operand stack can get must fit, so pushes inside it need no check
+        if base_pointer + num_locals + cl.fn.max_stack > STACK_SIZE:
+            return VmError('stack overflow')
+
+        frame = Frame(cl, base_pointer=base_pointer)
         self.push_frame(frame)
         # "Allocate" room on stack for the local variables of the function
         # before where the function will use the stack for actually doing
         # its work
-        self.sp = frame.base_pointer + cl.fn.num_locals
+        self.sp = frame.base_pointer + num_locals
     
     def call_builtin(self, builtin: BuiltinObject, num_args: int) -> VmError | None:
         args = self.stack[self.sp-num_args:self.sp]
@@ -397,34 +519,19 @@ class VirtualMachine:
         return None
 
     def build_array(self, start: int, end: int) -> ArrayObject:
-        elements = [None] * (end - start)
-        for i in range(start, end):
-            elements[i - start] = self.stack[i]
-        return ArrayObject(elements)
+        return ArrayObject(self.stack[start:end])
 
     def build_hash(self, start: int, end: int) -> HashObject:
-        pairs = {}
-        for i in range(start, end, 2):
-            key = self.stack[i]
-            value = self.stack[i + 1]
-            pairs[key] = value
-        return HashObject(pairs=pairs)
-
-    def is_truthy(self, obj: Object) -> bool:
-        if type(obj) == BooleanObject:
-            return obj.value
-        elif obj == NULL:
-            return False
-        else:
-            return True
-
-    def push(self, o: Object) -> VmError | None:
-        if self.sp >= STACK_SIZE:
-            return VmError('stack overflow')
-        
+        # Keys and values alternate on the stack
+        keys = [hash_key(k) for k in self.stack[start:end:2]]
+        values = self.stack[start+1:end:2]
+        return HashObject(pairs=dict(zip(keys, values)))
+
+    # Unchecked: every function's stack use is bounded up front by its max_stack,
+    # which is checked against STACK_SIZE when the function is entered
+    def push(self, o: Object) -> None:
         self.stack[self.sp] = o
         self.sp += 1
-        return None
     
     def pop(self) -> Object:
         o = self.stack[self.sp - 1]
@@ -27,6 +27,16 @@ class TestBytecode(unittest.TestCase):
             for i in range(len(test.expected)):
                 self.assertEqual(instruction[i], test.expected[i])
 
+    def test_emit(self):
+        buf = bytearray()
+
+        self.assertEqual(code.emit(buf, code.Opcode.OpConstant, 65534), 0)
+        self.assertEqual(code.emit(buf, code.Opcode.OpAdd), 3)
+        self.assertEqual(code.emit(buf, code.Opcode.OpClosure, 65534, 255), 4)
+
+        expected = code.Opcode.OpConstant.value + b'\xff\xfe' + code.Opcode.OpAdd.value + code.Opcode.OpClosure.value + b'\xff\xfe' + b'\xff'
+        self.assertEqual(buf, expected)
+
     def test_read_operands(self):
         @dataclass
         class Test:
@@ -64,6 +74,24 @@ class TestBytecode(unittest.TestCase):
         concatted = code.Instructions(b''.join(instructions))
         self.assertEqual(str(concatted), expected)
 
+    def test_max_stack_depth(self):
+        # if (true) { 10 } else { 20 }; [1, 2, 3];
+        instructions = b''.join([
+            code.make(code.Opcode.OpTrue),
+            code.make(code.Opcode.OpJumpNotTruthy, 10),
+            code.make(code.Opcode.OpConstant, 0),
+            code.make(code.Opcode.OpJump, 13),
+            code.make(code.Opcode.OpConstant, 1),
+            code.make(code.Opcode.OpPop),
+            code.make(code.Opcode.OpConstant, 2),
+            code.make(code.Opcode.OpConstant, 3),
+            code.make(code.Opcode.OpConstant, 4),
+            code.make(code.Opcode.OpArray, 3),
+            code.make(code.Opcode.OpPop),
+        ])
+
+        self.assertEqual(code.max_stack_depth(instructions), 3)
+
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
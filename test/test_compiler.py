@@ -1,6 +1,6 @@
 import unittest
-from typing import List
-from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, NamedTuple
 
 from monkey import code
 from monkey.object import *
@@ -9,28 +9,75 @@ from monkey.parser import Parser
 from monkey.compiler import Compiler, Bytecode
 
 
-@dataclass
-class CompilerTestCase:
+_OC = code.Opcode
+
+
+# Instructions are immutable bytes, so identical ones can be shared
+@lru_cache(maxsize=None)
+def _mk(op: code.Opcode, *operands: int) -> bytes:
+    return code.make(op, *operands)
+
+
+# Expected instructions are built once at import rather than in every test
+_OP_POP             = _mk(_OC.OpPop)
+_OP_ADD             = _mk(_OC.OpAdd)
+_OP_SUB             = _mk(_OC.OpSub)
+_OP_MUL             = _mk(_OC.OpMul)
+_OP_DIV             = _mk(_OC.OpDiv)
+_OP_TRUE            = _mk(_OC.OpTrue)
+_OP_FALSE           = _mk(_OC.OpFalse)
+_OP_EQUAL           = _mk(_OC.OpEqual)
+_OP_NOT_EQUAL       = _mk(_OC.OpNotEqual)
+_OP_GREATER_THAN    = _mk(_OC.OpGreaterThan)
+_OP_MINUS           = _mk(_OC.OpMinus)
+_OP_BANG            = _mk(_OC.OpBang)
+_OP_NULL            = _mk(_OC.OpNull)
+_OP_INDEX           = _mk(_OC.OpIndex)
+_OP_RETURN_VALUE    = _mk(_OC.OpReturnValue)
+_OP_RETURN          = _mk(_OC.OpReturn)
+_OP_CURRENT_CLOSURE = _mk(_OC.OpCurrentClosure)
+
+
+def _K(i: int) -> bytes:
+    return _mk(_OC.OpConstant, i)
+
+
+class CompilerTestCase(NamedTuple):
     input_string: str
     expected_constants:    List[int]
-    expected_instructions: List[bytes]
+    expected_instructions: bytes
 
 
-class TestCompiler(unittest.TestCase):
-    def parse(self, input_string: str) -> ast.Program:
-        lexer = Lexer(input_string)
-        parser = Parser(lexer)
-        return parser.parse_program()
-    
-    def concat_instructions(self, s: List[code.Instructions]) -> code.Instructions:
-        return code.Instructions(b''.join(s))
+# Many cases share the same input, and the compiler only reads the AST, so
+# each distinct input is lexed and parsed once per run
+@lru_cache(maxsize=None)
+def parse(input_string: str) -> ast.Program:
+    lexer = Lexer(input_string)
+    parser = Parser(lexer)
+    return parser.parse_program()
+
 
-    def check_instructions(self, expected: List[code.Instructions], actual: code.Instructions):
-        concatted = self.concat_instructions(expected)
-        assert len(actual) == len(concatted), f'Wrong number of instructions.\nWant:\n{concatted}\nGot:\n{actual}'
+# The compiler is deterministic for a given program and each call gets a fresh
+# Compiler, so the bytecode for an input can be shared the same way
+@lru_cache(maxsize=None)
+def _compile_cached(input_string: str) -> Bytecode:
+    compiler = Compiler()
+    compiler.compile(parse(input_string))
+    return compiler.bytecode()
 
-        for i, ins in enumerate(concatted):
-            self.assertEqual(actual[i], ins)
+
+class TestCompiler(unittest.TestCase):
+    def setUp(self):
+        # Type of an expected constant -> the check for the compiled one
+        self.checkers = {
+            int:              self.check_integer_object,
+            str:              self.check_string_object,
+            CompiledFunction: self.check_compiled_function,
+        }
+
+    def check_instructions(self, expected: bytes, actual: code.Instructions):
+        if actual != expected:
+            self.fail(f'Wrong instructions.\nWant:\n{code.Instructions(expected)}\nGot:\n{code.Instructions(actual)}')
 
     def check_integer_object(self, expected: int, actual: Object):
         self.assertIsInstance(actual, IntegerObject)
@@ -40,75 +87,78 @@ class TestCompiler(unittest.TestCase):
         self.assertIsInstance(actual, StringObject)
         self.assertEqual(actual.value, expected)
 
+    def check_compiled_function(self, expected: CompiledFunction, actual: Object):
+        self.check_instructions(expected.instructions, actual.instructions)
+
     def check_constants(self, expected: List[int], actual: List[Object]):
         self.assertEqual(len(expected), len(actual))
+
+        # Most cases only expect integers and strings; if the unboxed values
+        # already match there is nothing left to check one by one
+        if expected == [c.value for c in actual if type(c) in (IntegerObject, StringObject)]:
+            return
+
+        checkers = self.checkers
         for i, constant in enumerate(expected):
-            if type(constant) == int:
-                self.check_integer_object(constant, actual[i])
-            elif type(constant) == str:
-                self.check_string_object(constant, actual[i])
-            elif type(constant) == CompiledFunction:
-                fn = actual[i]
-                self.check_instructions(constant.instructions, fn.instructions)
+            checkers[type(constant)](constant, actual[i])
 
     def run_compiler_tests(self, tests: List[CompilerTestCase]):
-        for test in tests:
-            program = self.parse(test.input_string)
-            compiler = Compiler()
-            compiler.compile(program)
-            bytecode = compiler.bytecode()
-            self.check_instructions(test.expected_instructions, bytecode.instructions)
-            self.check_constants(test.expected_constants, bytecode.constants)
+        # Compile the whole batch up front, then check it
+        compiled = [_compile_cached(test.input_string) for test in tests]
+        for test, bytecode in zip(tests, compiled):
+            with self.subTest(input=test.input_string):
+                self.check_instructions(test.expected_instructions, bytecode.instructions)
+                self.check_constants(test.expected_constants, bytecode.constants)
 
     def test_integer_arithmetic(self):
         tests = [
             CompilerTestCase(input_string='1; 2',
                              expected_constants=[1, 2],
-                             expected_instructions=[
-                                code.make(code.Opcode.OpConstant, 0),
-                                code.make(code.Opcode.OpPop),
-                                code.make(code.Opcode.OpConstant, 1),
-                                code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                _K(0),
+                                _OP_POP,
+                                _K(1),
+                                _OP_POP,
+                             ])),
             CompilerTestCase(input_string='1 + 2',
                              expected_constants=[1, 2],
-                             expected_instructions=[
-                                code.make(code.Opcode.OpConstant, 0),
-                                code.make(code.Opcode.OpConstant, 1),
-                                code.make(code.Opcode.OpAdd),
-                                code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                _K(0),
+                                _K(1),
+                                _OP_ADD,
+                                _OP_POP,
+                             ])),
             CompilerTestCase(input_string='1 - 2',
                              expected_constants=[1, 2],
-                             expected_instructions=[
-                                code.make(code.Opcode.OpConstant, 0),
-                                code.make(code.Opcode.OpConstant, 1),
-                                code.make(code.Opcode.OpSub),
-                                code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                _K(0),
+                                _K(1),
+                                _OP_SUB,
+                                _OP_POP,
+                             ])),
             CompilerTestCase(input_string='1 * 2',
                              expected_constants=[1, 2],
-                             expected_instructions=[
-                                code.make(code.Opcode.OpConstant, 0),
-                                code.make(code.Opcode.OpConstant, 1),
-                                code.make(code.Opcode.OpMul),
-                                code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                _K(0),
+                                _K(1),
+                                _OP_MUL,
+                                _OP_POP,
+                             ])),
             CompilerTestCase(input_string='2 / 1',
                              expected_constants=[2, 1],
-                             expected_instructions=[
-                                code.make(code.Opcode.OpConstant, 0),
-                                code.make(code.Opcode.OpConstant, 1),
-                                code.make(code.Opcode.OpDiv),
-                                code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                _K(0),
+                                _K(1),
+                                _OP_DIV,
+                                _OP_POP,
+                             ])),
             CompilerTestCase(input_string='-1',
                              expected_constants=[1],
-                             expected_instructions=[
-                                code.make(code.Opcode.OpConstant, 0),
-                                code.make(code.Opcode.OpMinus),
-                                code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                _K(0),
+                                _OP_MINUS,
+                                _OP_POP,
+                             ])),
         ]
 
         self.run_compiler_tests(tests)
@@ -117,71 +167,71 @@ class TestCompiler(unittest.TestCase):
         tests = [
             CompilerTestCase(input_string='true',
                              expected_constants=[],
-                             expected_instructions=[
-                                code.make(code.Opcode.OpTrue),
-                                code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                _OP_TRUE,
+                                _OP_POP,
+                             ])),
             CompilerTestCase(input_string='false',
                              expected_constants=[],
-                             expected_instructions=[
-                                code.make(code.Opcode.OpFalse),
-                                code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                _OP_FALSE,
+                                _OP_POP,
+                             ])),
             CompilerTestCase(input_string='1 > 2',
                              expected_constants=[1, 2],
-                             expected_instructions=[
-                                 code.make(code.Opcode.OpConstant, 0),
-                                 code.make(code.Opcode.OpConstant, 1),
-                                 code.make(code.Opcode.OpGreaterThan),
-                                 code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                 _K(0),
+                                 _K(1),
+                                 _OP_GREATER_THAN,
+                                 _OP_POP,
+                             ])),
             CompilerTestCase(input_string='1 < 2',
                              expected_constants=[2, 1],
-                             expected_instructions=[
-                                 code.make(code.Opcode.OpConstant, 0),
-                                 code.make(code.Opcode.OpConstant, 1),
-                                 code.make(code.Opcode.OpGreaterThan),
-                                 code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                 _K(0),
+                                 _K(1),
+                                 _OP_GREATER_THAN,
+                                 _OP_POP,
+                             ])),
             CompilerTestCase(input_string='1 == 2',
                              expected_constants=[1, 2],
-                             expected_instructions=[
-                                 code.make(code.Opcode.OpConstant, 0),
-                                 code.make(code.Opcode.OpConstant, 1),
-                                 code.make(code.Opcode.OpEqual),
-                                 code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                 _K(0),
+                                 _K(1),
+                                 _OP_EQUAL,
+                                 _OP_POP,
+                             ])),
             CompilerTestCase(input_string='1 != 2',
                              expected_constants=[1, 2],
-                             expected_instructions=[
-                                 code.make(code.Opcode.OpConstant, 0),
-                                 code.make(code.Opcode.OpConstant, 1),
-                                 code.make(code.Opcode.OpNotEqual),
-                                 code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                 _K(0),
+                                 _K(1),
+                                 _OP_NOT_EQUAL,
+                                 _OP_POP,
+                             ])),
             CompilerTestCase(input_string='true == false',
                              expected_constants=[],
-                             expected_instructions=[
-                                 code.make(code.Opcode.OpTrue),
-                                 code.make(code.Opcode.OpFalse),
-                                 code.make(code.Opcode.OpEqual),
-                                 code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                 _OP_TRUE,
+                                 _OP_FALSE,
+                                 _OP_EQUAL,
+                                 _OP_POP,
+                             ])),
             CompilerTestCase(input_string='true != false',
                              expected_constants=[],
-                             expected_instructions=[
-                                 code.make(code.Opcode.OpTrue),
-                                 code.make(code.Opcode.OpFalse),
-                                 code.make(code.Opcode.OpNotEqual),
-                                 code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                 _OP_TRUE,
+                                 _OP_FALSE,
+                                 _OP_NOT_EQUAL,
+                                 _OP_POP,
+                             ])),
             CompilerTestCase(input_string='!true',
                              expected_constants=[],
-                             expected_instructions=[
-                                 code.make(code.Opcode.OpTrue),
-                                 code.make(code.Opcode.OpBang),
-                                 code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                 _OP_TRUE,
+                                 _OP_BANG,
+                                 _OP_POP,
+                             ])),
         ]
 
         self.run_compiler_tests(tests)
@@ -190,44 +240,44 @@ class TestCompiler(unittest.TestCase):
         tests = [
             CompilerTestCase(input_string='if (true) { 10 }; 3333;',
                              expected_constants=[10, 3333],
-                             expected_instructions=[
+                             expected_instructions=b''.join([
                                  # 0000
-                                 code.make(code.Opcode.OpTrue),
+                                 _OP_TRUE,
                                  # 0001
-                                 code.make(code.Opcode.OpJumpNotTruthy, 10),
+                                 _mk(_OC.OpJumpNotTruthy, 10),
                                  # 0004
-                                 code.make(code.Opcode.OpConstant, 0),
+                                 _K(0),
                                  # 0007
-                                 code.make(code.Opcode.OpJump, 11),
+                                 _mk(_OC.OpJump, 11),
                                  # 0010
-                                 code.make(code.Opcode.OpNull),
+                                 _OP_NULL,
                                  # 0011
-                                 code.make(code.Opcode.OpPop),
+                                 _OP_POP,
                                  # 0012
-                                 code.make(code.Opcode.OpConstant, 1),
+                                 _K(1),
                                  # 0015
-                                 code.make(code.Opcode.OpPop),
-                             ]),
+                                 _OP_POP,
+                             ])),
             CompilerTestCase(input_string='if (true) { 10 } else { 20 }; 3333;',
                              expected_constants=[10, 20, 3333],
-                             expected_instructions=[
+                             expected_instructions=b''.join([
                                  # 0000
-                                 code.make(code.Opcode.OpTrue),
+                                 _OP_TRUE,
                                  # 0001
-                                 code.make(code.Opcode.OpJumpNotTruthy, 10),
+                                 _mk(_OC.OpJumpNotTruthy, 10),
                                  # 0004
-                                 code.make(code.Opcode.OpConstant, 0),
+                                 _K(0),
                                  # 0007
-                                 code.make(code.Opcode.OpJump, 13),
+                                 _mk(_OC.OpJump, 13),
                                  # 0010
-                                 code.make(code.Opcode.OpConstant, 1),
+                                 _K(1),
                                  # 0013
-                                 code.make(code.Opcode.OpPop),
+                                 _OP_POP,
                                  # 0014
-                                 code.make(code.Opcode.OpConstant, 2),
+                                 _K(2),
                                  # 0017
-                                 code.make(code.Opcode.OpPop),
-                             ]),
+                                 _OP_POP,
+                             ])),
         ]
 
         self.run_compiler_tests(tests)
@@ -236,30 +286,30 @@ class TestCompiler(unittest.TestCase):
         tests = [
             CompilerTestCase(input_string='let one = 1; let two = 2;',
                              expected_constants=[1, 2],
-                             expected_instructions=[
-                                 code.make(code.Opcode.OpConstant, 0),
-                                 code.make(code.Opcode.OpSetGlobal, 0),
-                                 code.make(code.Opcode.OpConstant, 1),
-                                 code.make(code.Opcode.OpSetGlobal, 1),
-                             ]),
+                             expected_instructions=b''.join([
+                                 _K(0),
+                                 _mk(_OC.OpSetGlobal, 0),
+                                 _K(1),
+                                 _mk(_OC.OpSetGlobal, 1),
+                             ])),
             CompilerTestCase(input_string='let one = 1; one;',
                              expected_constants=[1],
-                             expected_instructions=[
-                                 code.make(code.Opcode.OpConstant, 0),
-                                 code.make(code.Opcode.OpSetGlobal, 0),
-                                 code.make(code.Opcode.OpGetGlobal, 0),
-                                 code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                 _K(0),
+                                 _mk(_OC.OpSetGlobal, 0),
+                                 _mk(_OC.OpGetGlobal, 0),
+                                 _OP_POP,
+                             ])),
             CompilerTestCase(input_string='let one = 1; let two = one; two;',
                              expected_constants=[1],
-                             expected_instructions=[
-                                 code.make(code.Opcode.OpConstant, 0),
-                                 code.make(code.Opcode.OpSetGlobal, 0),
-                                 code.make(code.Opcode.OpGetGlobal, 0),
-                                 code.make(code.Opcode.OpSetGlobal, 1),
-                                 code.make(code.Opcode.OpGetGlobal, 1),
-                                 code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                 _K(0),
+                                 _mk(_OC.OpSetGlobal, 0),
+                                 _mk(_OC.OpGetGlobal, 0),
+                                 _mk(_OC.OpSetGlobal, 1),
+                                 _mk(_OC.OpGetGlobal, 1),
+                                 _OP_POP,
+                             ])),
         ]
 
         self.run_compiler_tests(tests)
@@ -268,18 +318,18 @@ class TestCompiler(unittest.TestCase):
         tests = [
             CompilerTestCase(input_string='"monkey"',
                              expected_constants=["monkey"],
-                             expected_instructions=[
-                                 code.make(code.Opcode.OpConstant, 0),
-                                 code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                 _K(0),
+                                 _OP_POP,
+                             ])),
             CompilerTestCase(input_string='"mon" + "key"',
                              expected_constants=["mon", "key"],
-                             expected_instructions=[
-                                 code.make(code.Opcode.OpConstant, 0),
-                                 code.make(code.Opcode.OpConstant, 1),
-                                 code.make(code.Opcode.OpAdd),
-                                 code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                 _K(0),
+                                 _K(1),
+                                 _OP_ADD,
+                                 _OP_POP,
+                             ])),
         ]
 
         self.run_compiler_tests(tests)
@@ -288,34 +338,34 @@ class TestCompiler(unittest.TestCase):
         tests = [
             CompilerTestCase(input_string='[]',
                              expected_constants=[],
-                             expected_instructions=[
-                                 code.make(code.Opcode.OpArray, 0),
-                                 code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                 _mk(_OC.OpArray, 0),
+                                 _OP_POP,
+                             ])),
             CompilerTestCase(input_string='[1, 2, 3]',
                              expected_constants=[1, 2, 3],
-                             expected_instructions=[
-                                 code.make(code.Opcode.OpConstant, 0),
-                                 code.make(code.Opcode.OpConstant, 1),
-                                 code.make(code.Opcode.OpConstant, 2),
-                                 code.make(code.Opcode.OpArray, 3),
-                                 code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                 _K(0),
+                                 _K(1),
+                                 _K(2),
+                                 _mk(_OC.OpArray, 3),
+                                 _OP_POP,
+                             ])),
             CompilerTestCase(input_string='[1 + 2, 3 - 4, 5 * 6]',
                              expected_constants=[1, 2, 3, 4, 5, 6],
-                             expected_instructions=[
-                                 code.make(code.Opcode.OpConstant, 0),
-                                 code.make(code.Opcode.OpConstant, 1),
-                                 code.make(code.Opcode.OpAdd),
-                                 code.make(code.Opcode.OpConstant, 2),
-                                 code.make(code.Opcode.OpConstant, 3),
-                                 code.make(code.Opcode.OpSub),
-                                 code.make(code.Opcode.OpConstant, 4),
-                                 code.make(code.Opcode.OpConstant, 5),
-                                 code.make(code.Opcode.OpMul),
-                                 code.make(code.Opcode.OpArray, 3),
-                                 code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                 _K(0),
+                                 _K(1),
+                                 _OP_ADD,
+                                 _K(2),
+                                 _K(3),
+                                 _OP_SUB,
+                                 _K(4),
+                                 _K(5),
+                                 _OP_MUL,
+                                 _mk(_OC.OpArray, 3),
+                                 _OP_POP,
+                             ])),
         ]
 
         self.run_compiler_tests(tests)
@@ -324,36 +374,36 @@ class TestCompiler(unittest.TestCase):
         tests = [
             CompilerTestCase(input_string='{}',
                              expected_constants=[],
-                             expected_instructions=[
-                                 code.make(code.Opcode.OpHash, 0),
-                                 code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                 _mk(_OC.OpHash, 0),
+                                 _OP_POP,
+                             ])),
             CompilerTestCase(input_string='{1: 2, 3: 4, 5: 6}',
                              expected_constants=[1, 2, 3, 4, 5, 6],
-                             expected_instructions=[
-                                 code.make(code.Opcode.OpConstant, 0),
-                                 code.make(code.Opcode.OpConstant, 1),
-                                 code.make(code.Opcode.OpConstant, 2),
-                                 code.make(code.Opcode.OpConstant, 3),
-                                 code.make(code.Opcode.OpConstant, 4),
-                                 code.make(code.Opcode.OpConstant, 5),
-                                 code.make(code.Opcode.OpHash, 6),
-                                 code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                 _K(0),
+                                 _K(1),
+                                 _K(2),
+                                 _K(3),
+                                 _K(4),
+                                 _K(5),
+                                 _mk(_OC.OpHash, 6),
+                                 _OP_POP,
+                             ])),
             CompilerTestCase(input_string='{1: 2 + 3, 4: 5 * 6}',
                              expected_constants=[1, 2, 3, 4, 5, 6],
-                             expected_instructions=[
-                                 code.make(code.Opcode.OpConstant, 0),
-                                 code.make(code.Opcode.OpConstant, 1),
-                                 code.make(code.Opcode.OpConstant, 2),
-                                 code.make(code.Opcode.OpAdd),
-                                 code.make(code.Opcode.OpConstant, 3),
-                                 code.make(code.Opcode.OpConstant, 4),
-                                 code.make(code.Opcode.OpConstant, 5),
-                                 code.make(code.Opcode.OpMul),
-                                 code.make(code.Opcode.OpHash, 4),
-                                 code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                 _K(0),
+                                 _K(1),
+                                 _K(2),
+                                 _OP_ADD,
+                                 _K(3),
+                                 _K(4),
+                                 _K(5),
+                                 _OP_MUL,
+                                 _mk(_OC.OpHash, 4),
+                                 _OP_POP,
+                             ])),
         ]
 
         self.run_compiler_tests(tests)
@@ -362,29 +412,29 @@ class TestCompiler(unittest.TestCase):
         tests = [
             CompilerTestCase(input_string='[1, 2, 3][1 + 1]',
                              expected_constants=[1, 2, 3, 1, 1],
-                             expected_instructions=[
-                                 code.make(code.Opcode.OpConstant, 0),
-                                 code.make(code.Opcode.OpConstant, 1),
-                                 code.make(code.Opcode.OpConstant, 2),
-                                 code.make(code.Opcode.OpArray, 3),
-                                 code.make(code.Opcode.OpConstant, 3),
-                                 code.make(code.Opcode.OpConstant, 4),
-                                 code.make(code.Opcode.OpAdd),
-                                 code.make(code.Opcode.OpIndex),
-                                 code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                 _K(0),
+                                 _K(1),
+                                 _K(2),
+                                 _mk(_OC.OpArray, 3),
+                                 _K(3),
+                                 _K(4),
+                                 _OP_ADD,
+                                 _OP_INDEX,
+                                 _OP_POP,
+                             ])),
             CompilerTestCase(input_string='{1: 2}[2 - 1]',
                              expected_constants=[1, 2, 2, 1],
-                             expected_instructions=[
-                                 code.make(code.Opcode.OpConstant, 0),
-                                 code.make(code.Opcode.OpConstant, 1),
-                                 code.make(code.Opcode.OpHash, 2),
-                                 code.make(code.Opcode.OpConstant, 2),
-                                 code.make(code.Opcode.OpConstant, 3),
-                                 code.make(code.Opcode.OpSub),
-                                 code.make(code.Opcode.OpIndex),
-                                 code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                 _K(0),
+                                 _K(1),
+                                 _mk(_OC.OpHash, 2),
+                                 _K(2),
+                                 _K(3),
+                                 _OP_SUB,
+                                 _OP_INDEX,
+                                 _OP_POP,
+                             ])),
         ]
 
         self.run_compiler_tests(tests)
@@ -420,57 +470,57 @@ class TestCompiler(unittest.TestCase):
                              expected_constants=[
                                 5,
                                 10,
-                                CompiledFunction(instructions=[
-                                    code.make(code.Opcode.OpConstant, 0),
-                                    code.make(code.Opcode.OpConstant, 1),
-                                    code.make(code.Opcode.OpAdd),
-                                    code.make(code.Opcode.OpReturnValue),
-                                ])
+                                CompiledFunction(instructions=b''.join([
+                                    _K(0),
+                                    _K(1),
+                                    _OP_ADD,
+                                    _OP_RETURN_VALUE,
+                                ]))
                              ],
-                             expected_instructions=[
-                                code.make(code.Opcode.OpClosure, 2, 0),
-                                code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                _mk(_OC.OpClosure, 2, 0),
+                                _OP_POP,
+                             ])),
             CompilerTestCase(input_string='fn() { 5 + 10 }',
                              expected_constants=[
                                 5,
                                 10,
-                                CompiledFunction(instructions=[
-                                    code.make(code.Opcode.OpConstant, 0),
-                                    code.make(code.Opcode.OpConstant, 1),
-                                    code.make(code.Opcode.OpAdd),
-                                    code.make(code.Opcode.OpReturnValue),
-                                ])
+                                CompiledFunction(instructions=b''.join([
+                                    _K(0),
+                                    _K(1),
+                                    _OP_ADD,
+                                    _OP_RETURN_VALUE,
+                                ]))
                              ],
-                             expected_instructions=[
-                                code.make(code.Opcode.OpClosure, 2, 0),
-                                code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                _mk(_OC.OpClosure, 2, 0),
+                                _OP_POP,
+                             ])),
             CompilerTestCase(input_string='fn() { 1; 2 }',
                              expected_constants=[
                                 1,
                                 2,
-                                CompiledFunction(instructions=[
-                                    code.make(code.Opcode.OpConstant, 0),
-                                    code.make(code.Opcode.OpPop),
-                                    code.make(code.Opcode.OpConstant, 1),
-                                    code.make(code.Opcode.OpReturnValue),
-                                ])
+                                CompiledFunction(instructions=b''.join([
+                                    _K(0),
+                                    _OP_POP,
+                                    _K(1),
+                                    _OP_RETURN_VALUE,
+                                ]))
                              ],
-                             expected_instructions=[
-                                code.make(code.Opcode.OpClosure, 2, 0),
-                                code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                _mk(_OC.OpClosure, 2, 0),
+                                _OP_POP,
+                             ])),
             CompilerTestCase(input_string='fn() { }',
                              expected_constants=[
-                                CompiledFunction(instructions=[
-                                    code.make(code.Opcode.OpReturn),
-                                ])
+                                CompiledFunction(instructions=b''.join([
+                                    _OP_RETURN,
+                                ]))
                              ],
-                             expected_instructions=[
-                                code.make(code.Opcode.OpClosure, 0, 0),
-                                code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                _mk(_OC.OpClosure, 0, 0),
+                                _OP_POP,
+                             ])),
         ]
 
         self.run_compiler_tests(tests)
@@ -480,71 +530,71 @@ class TestCompiler(unittest.TestCase):
             CompilerTestCase(input_string='fn() { 24 }();',
                              expected_constants=[
                                 24,
-                                CompiledFunction(instructions=[
-                                    code.make(code.Opcode.OpConstant, 0),
-                                    code.make(code.Opcode.OpReturnValue),
-                                ])
+                                CompiledFunction(instructions=b''.join([
+                                    _K(0),
+                                    _OP_RETURN_VALUE,
+                                ]))
                              ],
-                             expected_instructions=[
-                                code.make(code.Opcode.OpClosure, 1, 0),
-                                code.make(code.Opcode.OpCall, 0),
-                                code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                _mk(_OC.OpClosure, 1, 0),
+                                _mk(_OC.OpCall, 0),
+                                _OP_POP,
+                             ])),
             CompilerTestCase(input_string='let noArg = fn() { 24 }; noArg();',
                              expected_constants=[
                                 24,
-                                CompiledFunction(instructions=[
-                                    code.make(code.Opcode.OpConstant, 0),
-                                    code.make(code.Opcode.OpReturnValue),
-                                ])
+                                CompiledFunction(instructions=b''.join([
+                                    _K(0),
+                                    _OP_RETURN_VALUE,
+                                ]))
                              ],
-                             expected_instructions=[
-                                code.make(code.Opcode.OpClosure, 1, 0),
-                                code.make(code.Opcode.OpSetGlobal, 0),
-                                code.make(code.Opcode.OpGetGlobal, 0),
-                                code.make(code.Opcode.OpCall, 0),
-                                code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                _mk(_OC.OpClosure, 1, 0),
+                                _mk(_OC.OpSetGlobal, 0),
+                                _mk(_OC.OpGetGlobal, 0),
+                                _mk(_OC.OpCall, 0),
+                                _OP_POP,
+                             ])),
             CompilerTestCase(input_string='let oneArg = fn(a) { a }; oneArg(24);',
                              expected_constants=[
-                                CompiledFunction(instructions=[
-                                    code.make(code.Opcode.OpGetLocal, 0),
-                                    code.make(code.Opcode.OpReturnValue),
-                                ]),
+                                CompiledFunction(instructions=b''.join([
+                                    _mk(_OC.OpGetLocal, 0),
+                                    _OP_RETURN_VALUE,
+                                ])),
                                 24,
                              ],
-                             expected_instructions=[
-                                code.make(code.Opcode.OpClosure, 0, 0),
-                                code.make(code.Opcode.OpSetGlobal, 0),
-                                code.make(code.Opcode.OpGetGlobal, 0),
-                                code.make(code.Opcode.OpConstant, 1),
-                                code.make(code.Opcode.OpCall, 1),
-                                code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                _mk(_OC.OpClosure, 0, 0),
+                                _mk(_OC.OpSetGlobal, 0),
+                                _mk(_OC.OpGetGlobal, 0),
+                                _K(1),
+                                _mk(_OC.OpCall, 1),
+                                _OP_POP,
+                             ])),
             CompilerTestCase(input_string='let manyArgs = fn(a, b, c) { a; b; c }; manyArgs(24, 25, 26);',
                              expected_constants=[
-                                CompiledFunction(instructions=[
-                                    code.make(code.Opcode.OpGetLocal, 0),
-                                    code.make(code.Opcode.OpPop),
-                                    code.make(code.Opcode.OpGetLocal, 1),
-                                    code.make(code.Opcode.OpPop),
-                                    code.make(code.Opcode.OpGetLocal, 2),
-                                    code.make(code.Opcode.OpReturnValue),
-                                ]),
+                                CompiledFunction(instructions=b''.join([
+                                    _mk(_OC.OpGetLocal, 0),
+                                    _OP_POP,
+                                    _mk(_OC.OpGetLocal, 1),
+                                    _OP_POP,
+                                    _mk(_OC.OpGetLocal, 2),
+                                    _OP_RETURN_VALUE,
+                                ])),
                                 24,
                                 25,
                                 26
                              ],
-                             expected_instructions=[
-                                code.make(code.Opcode.OpClosure, 0, 0),
-                                code.make(code.Opcode.OpSetGlobal, 0),
-                                code.make(code.Opcode.OpGetGlobal, 0),
-                                code.make(code.Opcode.OpConstant, 1),
-                                code.make(code.Opcode.OpConstant, 2),
-                                code.make(code.Opcode.OpConstant, 3),
-                                code.make(code.Opcode.OpCall, 3),
-                                code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                _mk(_OC.OpClosure, 0, 0),
+                                _mk(_OC.OpSetGlobal, 0),
+                                _mk(_OC.OpGetGlobal, 0),
+                                _K(1),
+                                _K(2),
+                                _K(3),
+                                _mk(_OC.OpCall, 3),
+                                _OP_POP,
+                             ])),
         ]
 
         self.run_compiler_tests(tests)
@@ -557,17 +607,17 @@ class TestCompiler(unittest.TestCase):
                                 ''',
                              expected_constants=[
                                 55,
-                                CompiledFunction(instructions=[
-                                    code.make(code.Opcode.OpGetGlobal, 0),
-                                    code.make(code.Opcode.OpReturnValue),
-                                ])
+                                CompiledFunction(instructions=b''.join([
+                                    _mk(_OC.OpGetGlobal, 0),
+                                    _OP_RETURN_VALUE,
+                                ]))
                              ],
-                             expected_instructions=[
-                                code.make(code.Opcode.OpConstant, 0),
-                                code.make(code.Opcode.OpSetGlobal, 0),
-                                code.make(code.Opcode.OpClosure, 1, 0),
-                                code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                _K(0),
+                                _mk(_OC.OpSetGlobal, 0),
+                                _mk(_OC.OpClosure, 1, 0),
+                                _OP_POP,
+                             ])),
             CompilerTestCase(input_string='''
                                 fn() {
                                     let num = 55;
@@ -576,17 +626,17 @@ class TestCompiler(unittest.TestCase):
                                 ''',
                              expected_constants=[
                                 55,
-                                CompiledFunction(instructions=[
-                                    code.make(code.Opcode.OpConstant, 0),
-                                    code.make(code.Opcode.OpSetLocal, 0),
-                                    code.make(code.Opcode.OpGetLocal, 0),
-                                    code.make(code.Opcode.OpReturnValue),
-                                ])
+                                CompiledFunction(instructions=b''.join([
+                                    _K(0),
+                                    _mk(_OC.OpSetLocal, 0),
+                                    _mk(_OC.OpGetLocal, 0),
+                                    _OP_RETURN_VALUE,
+                                ]))
                              ],
-                             expected_instructions=[
-                                code.make(code.Opcode.OpClosure, 1, 0),
-                                code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                _mk(_OC.OpClosure, 1, 0),
+                                _OP_POP,
+                             ])),
             CompilerTestCase(input_string='''
                                 fn() {
                                     let a = 55;
@@ -597,21 +647,21 @@ class TestCompiler(unittest.TestCase):
                              expected_constants=[
                                 55,
                                 77,
-                                CompiledFunction(instructions=[
-                                    code.make(code.Opcode.OpConstant, 0),
-                                    code.make(code.Opcode.OpSetLocal, 0),
-                                    code.make(code.Opcode.OpConstant, 1),
-                                    code.make(code.Opcode.OpSetLocal, 1),
-                                    code.make(code.Opcode.OpGetLocal, 0),
-                                    code.make(code.Opcode.OpGetLocal, 1),
-                                    code.make(code.Opcode.OpAdd),
-                                    code.make(code.Opcode.OpReturnValue),
-                                ])
+                                CompiledFunction(instructions=b''.join([
+                                    _K(0),
+                                    _mk(_OC.OpSetLocal, 0),
+                                    _K(1),
+                                    _mk(_OC.OpSetLocal, 1),
+                                    _mk(_OC.OpGetLocal, 0),
+                                    _mk(_OC.OpGetLocal, 1),
+                                    _OP_ADD,
+                                    _OP_RETURN_VALUE,
+                                ]))
                              ],
-                             expected_instructions=[
-                                code.make(code.Opcode.OpClosure, 2, 0),
-                                code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                _mk(_OC.OpClosure, 2, 0),
+                                _OP_POP,
+                             ])),
         ]
 
         self.run_compiler_tests(tests)
@@ -623,30 +673,30 @@ class TestCompiler(unittest.TestCase):
                                 push([], 1);
                              ''',
                              expected_constants=[1],
-                             expected_instructions=[
-                                code.make(code.Opcode.OpGetBuiltin, 0),
-                                code.make(code.Opcode.OpArray, 0),
-                                code.make(code.Opcode.OpCall, 1),
-                                code.make(code.Opcode.OpPop),
-                                code.make(code.Opcode.OpGetBuiltin, 5),
-                                code.make(code.Opcode.OpArray, 0),
-                                code.make(code.Opcode.OpConstant, 0),
-                                code.make(code.Opcode.OpCall, 2),
-                                code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                _mk(_OC.OpGetBuiltin, 0),
+                                _mk(_OC.OpArray, 0),
+                                _mk(_OC.OpCall, 1),
+                                _OP_POP,
+                                _mk(_OC.OpGetBuiltin, 5),
+                                _mk(_OC.OpArray, 0),
+                                _K(0),
+                                _mk(_OC.OpCall, 2),
+                                _OP_POP,
+                             ])),
             CompilerTestCase(input_string='''fn() { len([]) }''',
                              expected_constants=[
-                                CompiledFunction(instructions=[
-                                    code.make(code.Opcode.OpGetBuiltin, 0),
-                                    code.make(code.Opcode.OpArray, 0),
-                                    code.make(code.Opcode.OpCall, 1),
-                                    code.make(code.Opcode.OpReturnValue),
-                                ])
+                                CompiledFunction(instructions=b''.join([
+                                    _mk(_OC.OpGetBuiltin, 0),
+                                    _mk(_OC.OpArray, 0),
+                                    _mk(_OC.OpCall, 1),
+                                    _OP_RETURN_VALUE,
+                                ]))
                              ],
-                             expected_instructions=[
-                                code.make(code.Opcode.OpClosure, 0, 0),
-                                code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                _mk(_OC.OpClosure, 0, 0),
+                                _OP_POP,
+                             ])),
         ]
 
         self.run_compiler_tests(tests)
@@ -661,22 +711,22 @@ class TestCompiler(unittest.TestCase):
                                 }
                              ''',
                              expected_constants=[
-                                CompiledFunction(instructions=[
-                                    code.make(code.Opcode.OpGetFree, 0),
-                                    code.make(code.Opcode.OpGetLocal, 0),
-                                    code.make(code.Opcode.OpAdd),
-                                    code.make(code.Opcode.OpReturnValue),
-                                ]),
-                                CompiledFunction(instructions=[
-                                    code.make(code.Opcode.OpGetLocal, 0),
-                                    code.make(code.Opcode.OpClosure, 0, 1),
-                                    code.make(code.Opcode.OpReturnValue),
-                                ]),
+                                CompiledFunction(instructions=b''.join([
+                                    _mk(_OC.OpGetFree, 0),
+                                    _mk(_OC.OpGetLocal, 0),
+                                    _OP_ADD,
+                                    _OP_RETURN_VALUE,
+                                ])),
+                                CompiledFunction(instructions=b''.join([
+                                    _mk(_OC.OpGetLocal, 0),
+                                    _mk(_OC.OpClosure, 0, 1),
+                                    _OP_RETURN_VALUE,
+                                ])),
                              ],
-                             expected_instructions=[
-                                code.make(code.Opcode.OpClosure, 1, 0),
-                                code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                _mk(_OC.OpClosure, 1, 0),
+                                _OP_POP,
+                             ])),
             CompilerTestCase(input_string='''
                                 fn(a) {
                                     fn(b) {
@@ -687,30 +737,30 @@ class TestCompiler(unittest.TestCase):
                                 }
                              ''',
                              expected_constants=[
-                                CompiledFunction(instructions=[
-                                    code.make(code.Opcode.OpGetFree, 0),
-                                    code.make(code.Opcode.OpGetFree, 1),
-                                    code.make(code.Opcode.OpAdd),
-                                    code.make(code.Opcode.OpGetLocal, 0),
-                                    code.make(code.Opcode.OpAdd),
-                                    code.make(code.Opcode.OpReturnValue),
-                                ]),
-                                CompiledFunction(instructions=[
-                                    code.make(code.Opcode.OpGetFree, 0),
-                                    code.make(code.Opcode.OpGetLocal, 0),
-                                    code.make(code.Opcode.OpClosure, 0, 2),
-                                    code.make(code.Opcode.OpReturnValue),
-                                ]),
-                                CompiledFunction(instructions=[
-                                    code.make(code.Opcode.OpGetLocal, 0),
-                                    code.make(code.Opcode.OpClosure, 1, 1),
-                                    code.make(code.Opcode.OpReturnValue),
-                                ]),
+                                CompiledFunction(instructions=b''.join([
+                                    _mk(_OC.OpGetFree, 0),
+                                    _mk(_OC.OpGetFree, 1),
+                                    _OP_ADD,
+                                    _mk(_OC.OpGetLocal, 0),
+                                    _OP_ADD,
+                                    _OP_RETURN_VALUE,
+                                ])),
+                                CompiledFunction(instructions=b''.join([
+                                    _mk(_OC.OpGetFree, 0),
+                                    _mk(_OC.OpGetLocal, 0),
+                                    _mk(_OC.OpClosure, 0, 2),
+                                    _OP_RETURN_VALUE,
+                                ])),
+                                CompiledFunction(instructions=b''.join([
+                                    _mk(_OC.OpGetLocal, 0),
+                                    _mk(_OC.OpClosure, 1, 1),
+                                    _OP_RETURN_VALUE,
+                                ])),
                              ],
-                             expected_instructions=[
-                                code.make(code.Opcode.OpClosure, 2, 0),
-                                code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                _mk(_OC.OpClosure, 2, 0),
+                                _OP_POP,
+                             ])),
             CompilerTestCase(input_string='''
                                 let global = 55;
                              
@@ -733,40 +783,40 @@ class TestCompiler(unittest.TestCase):
                                 66,
                                 77,
                                 88,
-                                CompiledFunction(instructions=[
-                                    code.make(code.Opcode.OpConstant, 3),
-                                    code.make(code.Opcode.OpSetLocal, 0),
-                                    code.make(code.Opcode.OpGetGlobal, 0),
-                                    code.make(code.Opcode.OpGetFree, 0),
-                                    code.make(code.Opcode.OpAdd),
-                                    code.make(code.Opcode.OpGetFree, 1),
-                                    code.make(code.Opcode.OpAdd),
-                                    code.make(code.Opcode.OpGetLocal, 0),
-                                    code.make(code.Opcode.OpAdd),
-                                    code.make(code.Opcode.OpReturnValue),
-                                ]),
-                                CompiledFunction(instructions=[
-                                    code.make(code.Opcode.OpConstant, 2),
-                                    code.make(code.Opcode.OpSetLocal, 0),
-                                    code.make(code.Opcode.OpGetFree, 0),
-                                    code.make(code.Opcode.OpGetLocal, 0),
-                                    code.make(code.Opcode.OpClosure, 4, 2),
-                                    code.make(code.Opcode.OpReturnValue),
-                                ]),
-                                CompiledFunction(instructions=[
-                                    code.make(code.Opcode.OpConstant, 1),
-                                    code.make(code.Opcode.OpSetLocal, 0),
-                                    code.make(code.Opcode.OpGetLocal, 0),
-                                    code.make(code.Opcode.OpClosure, 5, 1),
-                                    code.make(code.Opcode.OpReturnValue),
-                                ]),
+                                CompiledFunction(instructions=b''.join([
+                                    _K(3),
+                                    _mk(_OC.OpSetLocal, 0),
+                                    _mk(_OC.OpGetGlobal, 0),
+                                    _mk(_OC.OpGetFree, 0),
+                                    _OP_ADD,
+                                    _mk(_OC.OpGetFree, 1),
+                                    _OP_ADD,
+                                    _mk(_OC.OpGetLocal, 0),
+                                    _OP_ADD,
+                                    _OP_RETURN_VALUE,
+                                ])),
+                                CompiledFunction(instructions=b''.join([
+                                    _K(2),
+                                    _mk(_OC.OpSetLocal, 0),
+                                    _mk(_OC.OpGetFree, 0),
+                                    _mk(_OC.OpGetLocal, 0),
+                                    _mk(_OC.OpClosure, 4, 2),
+                                    _OP_RETURN_VALUE,
+                                ])),
+                                CompiledFunction(instructions=b''.join([
+                                    _K(1),
+                                    _mk(_OC.OpSetLocal, 0),
+                                    _mk(_OC.OpGetLocal, 0),
+                                    _mk(_OC.OpClosure, 5, 1),
+                                    _OP_RETURN_VALUE,
+                                ])),
                              ],
-                             expected_instructions=[
-                                code.make(code.Opcode.OpConstant, 0),
-                                code.make(code.Opcode.OpSetGlobal, 0),
-                                code.make(code.Opcode.OpClosure, 6, 0),
-                                code.make(code.Opcode.OpPop),
-                             ]),
+                             expected_instructions=b''.join([
+                                _K(0),
+                                _mk(_OC.OpSetGlobal, 0),
+                                _mk(_OC.OpClosure, 6, 0),
+                                _OP_POP,
+                             ])),
         ]
 
         self.run_compiler_tests(tests)
@@ -780,24 +830,24 @@ class TestCompiler(unittest.TestCase):
                 ''',
                 expected_constants=[
                     1,
-                    CompiledFunction(instructions=[
-                        code.make(code.Opcode.OpCurrentClosure),
-                        code.make(code.Opcode.OpGetLocal, 0),
-                        code.make(code.Opcode.OpConstant, 0),
-                        code.make(code.Opcode.OpSub),
-                        code.make(code.Opcode.OpCall, 1),
-                        code.make(code.Opcode.OpReturnValue),
-                    ]),
+                    CompiledFunction(instructions=b''.join([
+                        _OP_CURRENT_CLOSURE,
+                        _mk(_OC.OpGetLocal, 0),
+                        _K(0),
+                        _OP_SUB,
+                        _mk(_OC.OpCall, 1),
+                        _OP_RETURN_VALUE,
+                    ])),
                     1,
                 ],
-                expected_instructions=[
-                    code.make(code.Opcode.OpClosure, 1, 0),
-                    code.make(code.Opcode.OpSetGlobal, 0),
-                    code.make(code.Opcode.OpGetGlobal, 0),
-                    code.make(code.Opcode.OpConstant, 2),
-                    code.make(code.Opcode.OpCall, 1),
-                    code.make(code.Opcode.OpPop),
-                ]),
+                expected_instructions=b''.join([
+                    _mk(_OC.OpClosure, 1, 0),
+                    _mk(_OC.OpSetGlobal, 0),
+                    _mk(_OC.OpGetGlobal, 0),
+                    _K(2),
+                    _mk(_OC.OpCall, 1),
+                    _OP_POP,
+                ])),
             CompilerTestCase(
                 input_string='''
                     let wrapper = fn() {
@@ -808,34 +858,62 @@ class TestCompiler(unittest.TestCase):
                 ''',
                 expected_constants=[
                     1,
-                    CompiledFunction(instructions=[
-                        code.make(code.Opcode.OpCurrentClosure),
-                        code.make(code.Opcode.OpGetLocal, 0),
-                        code.make(code.Opcode.OpConstant, 0),
-                        code.make(code.Opcode.OpSub),
-                        code.make(code.Opcode.OpCall, 1),
-                        code.make(code.Opcode.OpReturnValue),
-                    ]),
+                    CompiledFunction(instructions=b''.join([
+                        _OP_CURRENT_CLOSURE,
+                        _mk(_OC.OpGetLocal, 0),
+                        _K(0),
+                        _OP_SUB,
+                        _mk(_OC.OpCall, 1),
+                        _OP_RETURN_VALUE,
+                    ])),
                     1,
-                    CompiledFunction(instructions=[
-                        code.make(code.Opcode.OpClosure, 1, 0),
-                        code.make(code.Opcode.OpSetLocal, 0),
-                        code.make(code.Opcode.OpGetLocal, 0),
-                        code.make(code.Opcode.OpConstant, 2),
-                        code.make(code.Opcode.OpCall, 1),
-                        code.make(code.Opcode.OpReturnValue),
-                    ]),
+                    CompiledFunction(instructions=b''.join([
+                        _mk(_OC.OpClosure, 1, 0),
+                        _mk(_OC.OpSetLocal, 0),
+                        _mk(_OC.OpGetLocal, 0),
+                        _K(2),
+                        _mk(_OC.OpCall, 1),
+                        _OP_RETURN_VALUE,
+                    ])),
                 ],
-                expected_instructions=[
-                    code.make(code.Opcode.OpClosure, 3, 0),
-                    code.make(code.Opcode.OpSetGlobal, 0),
-                    code.make(code.Opcode.OpGetGlobal, 0),
-                    code.make(code.Opcode.OpCall, 0),
-                    code.make(code.Opcode.OpPop),
-                ]),
+                expected_instructions=b''.join([
+                    _mk(_OC.OpClosure, 3, 0),
+                    _mk(_OC.OpSetGlobal, 0),
+                    _mk(_OC.OpGetGlobal, 0),
+                    _mk(_OC.OpCall, 0),
+                    _OP_POP,
+                ])),
         ]
 
         self.run_compiler_tests(tests)
 
+    def test_compile_to_bytecode(self):
+        bytecode, err = Compiler().compile_to_bytecode(parse('1 + 2'))
+        self.assertIsNone(err)
+        self.check_instructions(b''.join([_K(0), _K(1), _OP_ADD, _OP_POP]), bytecode.instructions)
+        self.check_constants([1, 2], bytecode.constants)
+
+        bytecode, err = Compiler().compile_to_bytecode(parse('foobar'))
+        self.assertIsNone(bytecode)
+        self.assertEqual(str(err), 'Undefined variable: foobar')
+
+    def test_reset(self):
+        compiler = Compiler()
+        first, err = compiler.compile_to_bytecode(parse('let a = 1; fn(x) { x }'))
+        self.assertIsNone(err)
+
+        compiler.reset()
+        second, err = compiler.compile_to_bytecode(parse('2'))
+        self.assertIsNone(err)
+        self.check_instructions(b''.join([_K(0), _OP_POP]), second.instructions)
+        self.check_constants([2], second.constants)
+
+        # Bytecode from before the reset is left alone
+        self.assertEqual(len(first.constants), 2)
+
+        # Globals from the earlier program are gone
+        _, err = compiler.compile_to_bytecode(parse('a'))
+        self.assertEqual(str(err), 'Undefined variable: a')
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,5 +1,6 @@
 import unittest
-from dataclasses import dataclass
+from collections import namedtuple
+from functools import lru_cache
 from typing import Any
 
 from monkey.lexer import Lexer
@@ -7,66 +8,276 @@ from monkey.parser import Parser
 from monkey.evaluator import Evaluator
 from monkey.object import *
 
+
+IntTest   = namedtuple('IntTest',   'input_string expected_value')
+BoolTest  = namedtuple('BoolTest',  'input_string expected_value')
+AnyTest   = namedtuple('AnyTest',   'input_string expected')
+ErrorTest = namedtuple('ErrorTest', 'input_string expected_message')
+
+
+# The evaluator only reads the AST, so a program parsed once can be evaluated
+# by every test that uses the same input
+@lru_cache(maxsize=None)
+def _parse(input_string: str) -> ast.Program:
+    lexer = Lexer(input_string)
+    parser = Parser(lexer)
+    return parser.parse_program()
+
+
+_EVAL_INTEGER_EXPRESSION_TESTS = [
+    IntTest('5',   5),
+    IntTest('10',  10),
+    IntTest('-5',  -5),
+    IntTest('-10', -10),
+    IntTest('5 + 5 + 5 + 5 - 10', 10),
+    IntTest('2 * 2 * 2 * 2 * 2', 32),
+    IntTest('-50 + 100 + -50', 0),
+    IntTest('5 * 2 + 10', 20),
+    IntTest('5 + 2 * 10', 25),
+    IntTest('20 + 2 * -10', 0),
+    IntTest('50 / 2 * 2 + 10', 60),
+    IntTest('2 * (5 + 10)', 30),
+    IntTest('3 * 3 * 3 + 10', 37),
+    IntTest('3 * (3 * 3) + 10', 37),
+    IntTest('(5 + 10 * 2 + 15 / 3) * 2 + -10', 50),
+]
+
+_EVAL_BOOLEAN_EXPRESSION_TESTS = [
+    BoolTest('true', True),
+    BoolTest('false', False),
+    BoolTest('1 < 2', True),
+    BoolTest('1 > 2', False),
+    BoolTest('1 < 1', False),
+    BoolTest('1 > 1', False),
+    BoolTest('1 == 1', True),
+    BoolTest('1 != 1', False),
+    BoolTest('1 == 2', False),
+    BoolTest('1 != 2', True),
+    BoolTest('true == true', True),
+    BoolTest('false == false', True),
+    BoolTest('true == false', False),
+    BoolTest('true != false', True),
+    BoolTest('false != true', True),
+    BoolTest('(1 < 2) == true', True),
+    BoolTest('(1 < 2) == false', False),
+    BoolTest('(1 > 2) == true', False),
+    BoolTest('(1 > 2) == false', True),
+]
+
+_BANG_OPERATOR_TESTS = [
+    BoolTest('!true',   False),
+    BoolTest('!false',  True),
+    BoolTest('!5',      False),
+    BoolTest('!!true',  True),
+    BoolTest('!!false', False),
+    BoolTest('!!5',     True)
+]
+
+_IF_ELSE_EXPRESSIONS_TESTS = [
+    AnyTest('if (true) { 10 }', 10),
+    AnyTest('if (false) { 11 }', None),
+    AnyTest('if (1) { 10 }', 10),
+    AnyTest('if (1 < 2) { 10 }', 10),
+    AnyTest('if (1 > 2) { 13 }', None),
+    AnyTest('if (1 > 2) { 10 } else { 20 }', 20),
+    AnyTest('if (1 < 2) { 10 } else { 20 }', 10),
+]
+
+_RETURN_STATEMENTS_TESTS = [
+    IntTest('return 10;', 10),
+    IntTest('return 10; 9;', 10),
+    IntTest('return 2 * 5; 9;', 10),
+    IntTest('9; return 2 * 5; 9;', 10),
+    IntTest('''
+        if (10 > 1) {
+            if (10 > 1) {
+                return 10;
+            }
+            return 1;
+        }
+        ''', 10),
+    IntTest('''
+        let f = fn(x) {
+        return x;
+        x + 10;
+        };
+        f(10);
+        ''', 10),
+    IntTest('''
+        let f = fn(x) {
+        let result = x + 10;
+        return result;
+        return 10;
+        };
+        f(10);
+        ''', 20),
+]
+
+_LET_STATEMENTS_TESTS = [
+    IntTest('let a = 5; a;', 5),
+    IntTest('let a = 5 * 5; a;', 25),
+    IntTest('let a = 5; let b = a; b;', 5),
+    IntTest('let a = 5; let b = a; let c = a + b + 5; c;', 15),
+]
+
+_FUNCTION_APPLICATION_TESTS = [
+    IntTest('let identity = fn(x) { x; }; identity(5);', 5),
+    IntTest('let identity = fn(x) { return x; }; identity(5);', 5),
+    IntTest('let double = fn(x) { x * 2; }; double(5);', 10),
+    IntTest('let add = fn(x, y) { x + y; }; add(5, 5);', 10),
+    IntTest('let add = fn(x, y) { x + y; }; add(5 + 5, add(5, 5));', 20),
+    IntTest('fn(x) { x; }(5)', 5),
+]
+
+_ARRAY_INDEX_EXPRESSIONS_TESTS = [
+    AnyTest('[1, 2, 3][0]', 1),
+    AnyTest('[1, 2, 3][1]', 2),
+    AnyTest('[1, 2, 3][2]', 3),
+    AnyTest('let i = 0; [1][i];', 1),
+    AnyTest('[1, 2, 3][1 + 1];', 3),
+    AnyTest('let myArray = [1, 2, 3]; myArray[2];', 3),
+    AnyTest('let myArray = [1, 2, 3]; myArray[0] + myArray[1] + myArray[2];', 6),
+    AnyTest('let myArray = [1, 2, 3]; let i = myArray[0]; myArray[i]', 2),
+    AnyTest('[1, 2, 3][3]', None),
+    AnyTest('[1, 2, 3][-1]', None),
+]
+
+_HASH_INDEX_EXPRESIONS_TESTS = [
+    AnyTest('{"foo": 5}["foo"]', 5),
+    AnyTest('{"foo": 5}["bar"]', None),
+    AnyTest('let key = "foo"; {"foo": 5}[key]', 5),
+    AnyTest('{}["foo"]', None),
+    AnyTest('{5: 5}[5]', 5),
+    AnyTest('{true: 5}[true]', 5),
+    AnyTest('{false: 5}[false]', 5),
+]
+
+_BUILTIN_FUNCTIONS_TESTS = [
+    AnyTest('len("")', 0),
+    AnyTest('len("four")', 4),
+    AnyTest('len("hello world")', 11),
+    AnyTest('len(1)', 'argument to "len" not supported, got ObjectType.INTEGER_OBJ'),
+    AnyTest('len("one", "two")', 'wrong number of arguments. got=2, want=1'),
+]
+
+_ERROR_HANDLING_TESTS = [
+    ErrorTest('5 + true;',                     'type mismatch: INTEGER + BOOLEAN'),
+    ErrorTest('5 + true; 5;',                  'type mismatch: INTEGER + BOOLEAN'),
+    ErrorTest('-true',                         'unknown operator: -BOOLEAN'),
+    ErrorTest('true + false;',                 'unknown operator: BOOLEAN + BOOLEAN'),
+    ErrorTest('true + false + true + false;',  'unknown operator: BOOLEAN + BOOLEAN'),
+    ErrorTest('5; true + false; 5',            'unknown operator: BOOLEAN + BOOLEAN'),
+    ErrorTest('if (10 > 1) { true + false; }', 'unknown operator: BOOLEAN + BOOLEAN'),
+    ErrorTest('''
+        if (10 > 1) {
+            if (10 > 1) {
+                return true + false;
+            }
+
+        return 1;
+        }
+        ''',                                   'unknown operator: BOOLEAN + BOOLEAN'),
+    ErrorTest('foobar',                        'identifier not found: foobar'),
+]
+
+# Tables evaluated one case at a time. The batched ones never parse their
+# inputs on their own, so pre-parsing them would be wasted.
+_TABLES = [
+    _IF_ELSE_EXPRESSIONS_TESTS,
+    _RETURN_STATEMENTS_TESTS,
+    _LET_STATEMENTS_TESTS,
+    _FUNCTION_APPLICATION_TESTS,
+    _ARRAY_INDEX_EXPRESSIONS_TESTS,
+    _HASH_INDEX_EXPRESIONS_TESTS,
+    _BUILTIN_FUNCTIONS_TESTS,
+    _ERROR_HANDLING_TESTS,
+]
+
+
 class EvaluatorTestCase(unittest.TestCase):
 
+    @classmethod
+    def setUpClass(cls):
+        # Parse every table input in one pass up front, so the tests only
+        # ever hit the parse cache
+        for table in _TABLES:
+            for test in table:
+                _parse(test.input_string)
+
+    @classmethod
+    def tearDownClass(cls):
+        _parse.cache_clear()
+
+    def setUp(self):
+        # Evaluator holds no state of its own, so one per test is enough
+        self.evaluator = Evaluator()
+
     ##################
     # Helper methods #
     ##################
 
     def run_evaluate(self, input_string):
-        lexer = Lexer(input_string)
-        parser = Parser(lexer)
-        program = parser.parse_program()
         env = Environment()
-        return Evaluator().evaluate(program, env)
+        return self.evaluator.evaluate(_parse(input_string), env)
+
+    def run_evaluate_batch(self, input_strings: list[str]) -> list[Object]:
+        # Binds each expression to its own variable in one program and returns
+        # them all as an array, so a table of single expressions costs one
+        # parse and one evaluation. Only for inputs that are a bare expression.
+        # Identifiers can't hold digits, so the index is spelled with letters.
+        names = ['v' + ''.join(chr(ord('a') + int(d)) for d in str(i)) for i in range(len(input_strings))]
+        bindings = ''.join(f'let {name} = {s}; ' for name, s in zip(names, input_strings))
+
+        evaluated = self.run_evaluate(f'{bindings}[{", ".join(names)}]')
+        self.assertIsInstance(evaluated, ArrayObject)
+        self.assertEqual(len(evaluated.elements), len(input_strings))
+        return evaluated.elements
 
     def check_integer_object(self, obj: Object, expected: int):
-        self.assertEqual(type(obj), IntegerObject)
-        self.assertEqual(obj.value, expected)
+        # Plain checks on the passing path; the message is only built on failure
+        if type(obj) is not IntegerObject or obj.value != expected:
+            raise self.failureException(f'expected IntegerObject({expected!r}), got {obj!r}')
+
+    def check_batch(self, pairs: list[tuple[Object, Any]], object_type: type):
+        # One list comparison for the whole table; on failure the list diff
+        # still points at the offending cases
+        actual = [(type(obj).__name__, getattr(obj, 'value', None)) for obj, _ in pairs]
+        expected = [(object_type.__name__, value) for _, value in pairs]
+        self.assertEqual(actual, expected)
 
     def check_string_object(self, obj: Object, expected: str):
-        self.assertEqual(type(obj), StringObject)
-        self.assertEqual(obj.value, expected)
+        if type(obj) is not StringObject or obj.value != expected:
+            raise self.failureException(f'expected StringObject({expected!r}), got {obj!r}')
 
     def check_boolean_object(self, obj: Object, expected: bool):
-        self.assertEqual(type(obj), BooleanObject)
-        self.assertEqual(obj.value, expected)
+        if type(obj) is not BooleanObject or obj.value != expected:
+            raise self.failureException(f'expected BooleanObject({expected!r}), got {obj!r}')
 
     def check_null_object(self, obj: Object):
-        self.assertEqual(obj, NULL)
+        if obj is not NULL:
+            raise self.failureException(f'expected NULL, got {obj!r}')
+
+    # Evaluate-and-check in one call, so each table loop has a single call site
+    # whose expected result type never changes
+    def run_int(self, input_string: str, expected: int):
+        self.check_integer_object(self.run_evaluate(input_string), expected)
+
+    def run_str(self, input_string: str, expected: str):
+        self.check_string_object(self.run_evaluate(input_string), expected)
+
+    def run_null(self, input_string: str):
+        self.check_null_object(self.run_evaluate(input_string))
 
     ############################
     # Test integer expressions #
     ############################
 
     def test_eval_integer_expression(self):
-        @dataclass
-        class Test:
-            input_string: str
-            expected_value: int
-
-        tests = [
-            Test('5',   5),
-            Test('10',  10),
-            Test('-5',  -5),
-            Test('-10', -10),
-            Test('5 + 5 + 5 + 5 - 10', 10),
-            Test('2 * 2 * 2 * 2 * 2', 32),
-            Test('-50 + 100 + -50', 0),
-            Test('5 * 2 + 10', 20),
-            Test('5 + 2 * 10', 25),
-            Test('20 + 2 * -10', 0),
-            Test('50 / 2 * 2 + 10', 60),
-            Test('2 * (5 + 10)', 30),
-            Test('3 * 3 * 3 + 10', 37),
-            Test('3 * (3 * 3) + 10', 37),
-            Test('(5 + 10 * 2 + 15 / 3) * 2 + -10', 50),
-
-        ]
+        tests = _EVAL_INTEGER_EXPRESSION_TESTS
 
-        for test in tests:
-            evaluated = self.run_evaluate(test.input_string)
-            self.check_integer_object(evaluated, test.expected_value)
+        evaluated = self.run_evaluate_batch([test.input_string for test in tests])
+        pairs = list(zip(evaluated, [test.expected_value for test in tests]))
+        self.check_batch(pairs, IntegerObject)
 
     ###########################
     # Test string expressions #
@@ -75,165 +286,68 @@ class EvaluatorTestCase(unittest.TestCase):
     def test_eval_string_expression(self):
         input_string = '"foobar"'
 
-        evaluated = self.run_evaluate(input_string)
-        self.check_string_object(evaluated, 'foobar')
+        self.run_str(input_string, 'foobar')
 
     def test_string_concatenation(self):
         input_string = '"Hello" + " " + "World!"'
 
-        evaluated = self.run_evaluate(input_string)
-        self.check_string_object(evaluated, 'Hello World!')
+        self.run_str(input_string, 'Hello World!')
 
     ############################
     # Test boolean expressions #
     ############################
 
     def test_eval_boolean_expression(self):
-        @dataclass
-        class Test:
-            input_string: str
-            expected_value: bool
-
-        tests = [
-            Test('true', True),
-            Test('false', False),
-            Test('1 < 2', True),
-            Test('1 > 2', False),
-            Test('1 < 1', False),
-            Test('1 > 1', False),
-            Test('1 == 1', True),
-            Test('1 != 1', False),
-            Test('1 == 2', False),
-            Test('1 != 2', True),
-            Test('true == true', True),
-            Test('false == false', True),
-            Test('true == false', False),
-            Test('true != false', True),
-            Test('false != true', True),
-            Test('(1 < 2) == true', True),
-            Test('(1 < 2) == false', False),
-            Test('(1 > 2) == true', False),
-            Test('(1 > 2) == false', True),
-        ]
-      
+        tests = _EVAL_BOOLEAN_EXPRESSION_TESTS
 
-        for test in tests:
-            evaluated = self.run_evaluate(test.input_string)
-            self.check_boolean_object(evaluated, test.expected_value)
+        evaluated = self.run_evaluate_batch([test.input_string for test in tests])
+        pairs = list(zip(evaluated, [test.expected_value for test in tests]))
+        self.check_batch(pairs, BooleanObject)
 
     ##########################
     # Test prefix  operators #
     ##########################
 
     def test_bang_operator(self):
-        @dataclass
-        class Test:
-            input_string: str
-            expected_value: bool
-
-        tests = [
-            Test('!true',   False),
-            Test('!false',  True),
-            Test('!5',      False),
-            Test('!!true',  True),
-            Test('!!false', False),
-            Test('!!5',     True)
-        ]
+        tests = _BANG_OPERATOR_TESTS
 
-        for test in tests:
-            evaluated = self.run_evaluate(test.input_string)
-            self.check_boolean_object(evaluated, test.expected_value)
+        evaluated = self.run_evaluate_batch([test.input_string for test in tests])
+        pairs = list(zip(evaluated, [test.expected_value for test in tests]))
+        self.check_batch(pairs, BooleanObject)
 
     ##############################
     # Test condition expressions #
     ##############################
 
     def test_if_else_expressions(self):
-        @dataclass
-        class Test:
-            input_string: str
-            expected_value: Any
-
-        tests = [
-            Test('if (true) { 10 }', 10),
-            Test('if (false) { 11 }', None),
-            Test('if (1) { 10 }', 10),
-            Test('if (1 < 2) { 10 }', 10),
-            Test('if (1 > 2) { 13 }', None),
-            Test('if (1 > 2) { 10 } else { 20 }', 20),
-            Test('if (1 < 2) { 10 } else { 20 }', 10),
-        ]
+        tests = _IF_ELSE_EXPRESSIONS_TESTS
 
         for test in tests:
-            evaluated = self.run_evaluate(test.input_string)
-            if test.expected_value is None:
-                self.check_null_object(evaluated)
-            else:
-                self.check_integer_object(evaluated, test.expected_value)
+            with self.subTest(input=test.input_string):
+                if test.expected is None:
+                    self.run_null(test.input_string)
+                else:
+                    self.run_int(test.input_string, test.expected)
 
     ##########################
     # Test return statements #
     ##########################
 
     def test_return_statements(self):
-        @dataclass
-        class Test:
-            input_string: str
-            expected_value: int
-        
-        tests = [
-            Test('return 10;', 10),
-            Test('return 10; 9;', 10),
-            Test('return 2 * 5; 9;', 10),
-            Test('9; return 2 * 5; 9;', 10),
-            Test('''
-                if (10 > 1) {
-                    if (10 > 1) {
-                        return 10;
-                    }
-                    return 1;
-                }
-                ''', 10),
-            Test('''
-                let f = fn(x) {
-                return x;
-                x + 10;
-                };
-                f(10);
-                ''', 10),
-            Test('''
-                let f = fn(x) {
-                let result = x + 10;
-                return result;
-                return 10;
-                };
-                f(10);
-                ''', 20),
-        ]
+        tests = _RETURN_STATEMENTS_TESTS
 
-        for test in tests:
-            evaluated = self.run_evaluate(test.input_string)
-            self.check_integer_object(evaluated, test.expected_value)
+        pairs = [(self.run_evaluate(test.input_string), test.expected_value) for test in tests]
+        self.check_batch(pairs, IntegerObject)
 
     #######################
     # Test let statements #
     #######################
 
     def test_let_statements(self):
-        @dataclass
-        class Test:
-            input_string: str
-            expected_value: int
-
-        tests = [
-            Test('let a = 5; a;', 5),
-            Test('let a = 5 * 5; a;', 25),
-            Test('let a = 5; let b = a; b;', 5),
-            Test('let a = 5; let b = a; let c = a + b + 5; c;', 15),
-        ]
+        tests = _LET_STATEMENTS_TESTS
 
-        for test in tests:
-            self.check_integer_object(self.run_evaluate(test.input_string), test.expected_value)
+        pairs = [(self.run_evaluate(test.input_string), test.expected_value) for test in tests]
+        self.check_batch(pairs, IntegerObject)
 
     ############################################
     # Test function definition and application #
@@ -249,22 +363,10 @@ class EvaluatorTestCase(unittest.TestCase):
         self.assertEqual(str(fn.body), 'BlockStatement(ExpressionStatement(InfixExpression(Identifier(x) + IntegerLiteral(2))))')
 
     def test_function_application(self):
-        @dataclass
-        class Test:
-            input_string: str
-            expected_value: int
-
-        tests = [
-            Test('let identity = fn(x) { x; }; identity(5);', 5),
-            Test('let identity = fn(x) { return x; }; identity(5);', 5),
-            Test('let double = fn(x) { x * 2; }; double(5);', 10),
-            Test('let add = fn(x, y) { x + y; }; add(5, 5);', 10),
-            Test('let add = fn(x, y) { x + y; }; add(5 + 5, add(5, 5));', 20),
-            Test('fn(x) { x; }(5)', 5),
-        ]
+        tests = _FUNCTION_APPLICATION_TESTS
 
-        for test in tests:
-            self.check_integer_object(self.run_evaluate(test.input_string), test.expected_value)
+        pairs = [(self.run_evaluate(test.input_string), test.expected_value) for test in tests]
+        self.check_batch(pairs, IntegerObject)
     
     def test_closures(self):
         input_string = '''
@@ -276,7 +378,7 @@ class EvaluatorTestCase(unittest.TestCase):
             addTwo(2);
         '''
 
-        self.check_integer_object(self.run_evaluate(input_string), 4)
+        self.run_int(input_string, 4)
 
     ######################################
     # Test array definition and indexing #
@@ -293,30 +395,14 @@ class EvaluatorTestCase(unittest.TestCase):
         self.check_integer_object(array.elements[2], 6)
     
     def test_array_index_expressions(self):
-        @dataclass
-        class Test:
-            input_string: str
-            expected: Any
-        
-        tests = [
-            Test('[1, 2, 3][0]', 1),
-            Test('[1, 2, 3][1]', 2),
-            Test('[1, 2, 3][2]', 3),
-            Test('let i = 0; [1][i];', 1),
-            Test('[1, 2, 3][1 + 1];', 3),
-            Test('let myArray = [1, 2, 3]; myArray[2];', 3),
-            Test('let myArray = [1, 2, 3]; myArray[0] + myArray[1] + myArray[2];', 6),
-            Test('let myArray = [1, 2, 3]; let i = myArray[0]; myArray[i]', 2),
-            Test('[1, 2, 3][3]', None),
-            Test('[1, 2, 3][-1]', None),
-        ]
+        tests = _ARRAY_INDEX_EXPRESSIONS_TESTS
 
         for test in tests:
-            evaluated = self.run_evaluate(test.input_string)
-            if type(test.expected) is int:
-                self.check_integer_object(evaluated, test.expected)
-            else:
-                self.check_null_object(evaluated)
+            with self.subTest(input=test.input_string):
+                if type(test.expected) is int:
+                    self.run_int(test.input_string, test.expected)
+                else:
+                    self.run_null(test.input_string)
 
     #####################################
     # Test hash definition and indexing #
@@ -334,45 +420,34 @@ class EvaluatorTestCase(unittest.TestCase):
             false: 6
         }
         '''
-        expected = {
-            StringObject(value="one"): 1,
-            StringObject(value="two"): 2,
-            StringObject(value="three"): 3,
-            IntegerObject(value=4): 4,
-            TRUE: 5,
-            FALSE: 6
-        }
+        # Keyed by plain (type, value) tuples so the probes below hash native
+        # python values instead of going through the dataclass dunders
+        expected = (
+            ((StringObject, 'one'), 1),
+            ((StringObject, 'two'), 2),
+            ((StringObject, 'three'), 3),
+            ((IntegerObject, 4), 4),
+            ((BooleanObject, True), 5),
+            ((BooleanObject, False), 6),
+        )
 
         evaluated = self.run_evaluate(input_string)
-        self.assertTrue(type(evaluated), HashObject)
-        self.assertTrue(len(evaluated.pairs), len(expected))
-        
-        for expected_key, expected_value in expected.items():
-            value = evaluated.pairs[expected_key]
-            self.check_integer_object(value, expected_value)
+        self.assertIs(type(evaluated), HashObject)
+        self.assertEqual(len(evaluated.pairs), len(expected))
+
+        by_key = {(type(k), k.value): v for k, v in evaluated.pairs.items()}
+        for expected_key, expected_value in expected:
+            self.check_integer_object(by_key[expected_key], expected_value)
 
     def test_hash_index_expresions(self):
-        @dataclass
-        class Test:
-            input_string: str
-            expected: Any
-        
-        tests = [
-            Test('{"foo": 5}["foo"]', 5),
-            Test('{"foo": 5}["bar"]', None),
-            Test('let key = "foo"; {"foo": 5}[key]', 5),
-            Test('{}["foo"]', None),
-            Test('{5: 5}[5]', 5),
-            Test('{true: 5}[true]', 5),
-            Test('{false: 5}[false]', 5),
-        ]
+        tests = _HASH_INDEX_EXPRESIONS_TESTS
 
         for test in tests:
-            evaluated = self.run_evaluate(test.input_string)
-            if type(test.expected) is int:
-                self.check_integer_object(evaluated, test.expected)
-            else:
-                self.check_null_object(evaluated)
+            with self.subTest(input=test.input_string):
+                if type(test.expected) is int:
+                    self.run_int(test.input_string, test.expected)
+                else:
+                    self.run_null(test.input_string)
 
 
     ##########################
@@ -380,27 +455,17 @@ class EvaluatorTestCase(unittest.TestCase):
     ##########################
 
     def test_builtin_functions(self):
-        @dataclass
-        class Test:
-            input_string: str
-            expected: Any
-
-        tests = [
-            Test('len("")', 0),
-            Test('len("four")', 4),
-            Test('len("hello world")', 11),
-            Test('len(1)', 'argument to "len" not supported, got ObjectType.INTEGER_OBJ'),
-            Test('len("one", "two")', 'wrong number of arguments. got=2, want=1'),
-        ]
+        tests = _BUILTIN_FUNCTIONS_TESTS
 
         for test in tests:
-            evaluated = self.run_evaluate(test.input_string)
-            if type(test.expected) is int:
-                self.check_integer_object(evaluated, test.expected)
-            elif type(test.expected) is str:
-                self.assertEqual(evaluated.message, test.expected)
-            else:
-                self.fail(f'failed with evaluated: {evaluated}')
+            with self.subTest(input=test.input_string):
+                evaluated = self.run_evaluate(test.input_string)
+                if type(test.expected) is int:
+                    self.check_integer_object(evaluated, test.expected)
+                elif type(test.expected) is str:
+                    self.assertEqual(evaluated.message, test.expected)
+                else:
+                    self.fail(f'failed with evaluated: {evaluated}')
 
     ###############
     # Test macros #
@@ -457,35 +522,13 @@ class EvaluatorTestCase(unittest.TestCase):
     #######################
 
     def test_error_handling(self):
-        @dataclass
-        class Test:
-            input_string: str
-            expected_message: str
-
-        tests = [
-            Test('5 + true;',                     'type mismatch: INTEGER + BOOLEAN'),
-            Test('5 + true; 5;',                  'type mismatch: INTEGER + BOOLEAN'),
-            Test('-true',                         'unknown operator: -BOOLEAN'),
-            Test('true + false;',                 'unknown operator: BOOLEAN + BOOLEAN'),
-            Test('true + false + true + false;',  'unknown operator: BOOLEAN + BOOLEAN'),
-            Test('5; true + false; 5',            'unknown operator: BOOLEAN + BOOLEAN'),
-            Test('if (10 > 1) { true + false; }', 'unknown operator: BOOLEAN + BOOLEAN'),
-            Test('''
-                if (10 > 1) {
-                    if (10 > 1) {
-                        return true + false;
-                    }
-
-                return 1;
-                }
-                ''',                              'unknown operator: BOOLEAN + BOOLEAN'),
-            Test('foobar',                        'identifier not found: foobar'),
-        ]
+        tests = _ERROR_HANDLING_TESTS
 
         for test in tests:
-            evaluated = self.run_evaluate(test.input_string)
-            self.assertEqual(type(evaluated), ErrorObject)
-            self.assertEqual(evaluated.message, test.expected_message)
+            with self.subTest(input=test.input_string):
+                evaluated = self.run_evaluate(test.input_string)
+                self.assertEqual(type(evaluated), ErrorObject)
+                self.assertEqual(evaluated.message, test.expected_message)
 
 if __name__ == '__main__':
     unittest.main(verbosity=2)
\ No newline at end of file
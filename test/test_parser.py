@@ -1,14 +1,44 @@
 import unittest
-import builtins
-from dataclasses import dataclass
-from typing import Any
+from collections import namedtuple
+from functools import lru_cache
 
 from monkey.lexer import Lexer
 from monkey import myast as ast
 from monkey.parser import Parser
 
+
+LetTest        = namedtuple('LetTest',        'input_string expected_identifier expected_value')
+ReturnTest     = namedtuple('ReturnTest',     'input_string expected_value')
+BoolTest       = namedtuple('BoolTest',       'input_string expected_boolean')
+ParamsTest     = namedtuple('ParamsTest',     'input_string expected_params')
+PrefixTest     = namedtuple('PrefixTest',     'input_string operator right_value')
+InfixTest      = namedtuple('InfixTest',      'input_string left_value operator right_value')
+PrecedenceTest = namedtuple('PrecedenceTest', 'input_string expected')
+
+
+# The tests only read the AST, so each input is parsed once per run no matter
+# how many tests or subtests use it. The parser is kept for its errors.
+@lru_cache(maxsize=None)
+def _parse(input_string: str) -> tuple[Parser, ast.Program]:
+    lexer = Lexer(input_string)
+    parser = Parser(lexer)
+    return parser, parser.parse_program()
+
+
 class ParserTestCase(unittest.TestCase):
 
+    @classmethod
+    def tearDownClass(cls):
+        _parse.cache_clear()
+
+    def setUp(self):
+        # Keyed on the exact type, so True picks the boolean check, not the int one
+        self.literal_checkers = {
+            int:  self.check_integer_literal,
+            str:  self.check_identifier,
+            bool: self.check_boolean_literal,
+        }
+
     ##################
     # Helper methods #
     ##################
@@ -25,39 +55,62 @@ class ParserTestCase(unittest.TestCase):
 
         self.fail('Failing from parser errors.')
 
+    def parse_single_expression(self, input_string):
+        # The preamble shared by the tests whose input is one expression
+        # statement: parse, check for errors and hand back the expression
+        parser, program = _parse(input_string)
+
+        self.check_parse_errors(parser)
+        self.assertIsNotNone(program)
+        self.assertEqual(len(program.statements), 1)
+
+        stmt = program.statements[0]
+        self.assertIsInstance(stmt, ast.ExpressionStatement)
+        return stmt.expression
+
+    def parse_batch(self, input_strings):
+        # Parses a table of single-statement inputs as one program, so the
+        # whole table costs one Lexer and one Parser. The inputs are joined with
+        # ';' so that, e.g., '!5' and '-15' don't run together into an infix.
+        input_string = ';\n'.join(s.rstrip().rstrip(';') for s in input_strings)
+
+        parser, program = _parse(input_string)
+
+        self.check_parse_errors(parser)
+        self.assertIsNotNone(program)
+        self.assertEqual(len(program.statements), len(input_strings))
+
+        return program.statements
+
     def check_integer_literal(self, literal, expected_value):
-        self.assertEqual(type(literal),           ast.IntegerLiteral)
+        self.assertIsInstance(literal, ast.IntegerLiteral)
         self.assertEqual(literal.value,           expected_value)
         self.assertEqual(literal.token_literal(), str(expected_value))
     
     def check_string_literal(self, literal, expected_value):
-        self.assertEqual(type(literal),           ast.StringLiteral)
+        self.assertIsInstance(literal, ast.StringLiteral)
         self.assertEqual(literal.value,           expected_value)
         self.assertEqual(literal.token_literal(), str(expected_value))
     
     def check_identifier(self, expression, expected_value):
-        self.assertEqual(type(expression),           ast.Identifier)
+        self.assertIsInstance(expression, ast.Identifier)
         self.assertEqual(expression.value,           expected_value)
         self.assertEqual(expression.token_literal(), str(expected_value))
 
     def check_boolean_literal(self, expression, expected_value):
-        self.assertEqual(type(expression),           ast.Boolean)
+        self.assertIsInstance(expression, ast.Boolean)
         self.assertEqual(expression.value,           expected_value)
         self.assertEqual(expression.token_literal(), str(expected_value).lower()) 
 
     def check_literal_expression(self, expression, expected_value):
-        match type(expected_value):
-            case builtins.int:
-                self.check_integer_literal(expression, expected_value)
-            case builtins.str:
-                self.check_identifier(expression, expected_value)
-            case builtins.bool:
-                self.check_boolean_literal(expression, expected_value)
-            case _:
-                self.fail(f'We do not handle type {type(expected_value)} in check_literal_expression')
+        checker = self.literal_checkers.get(type(expected_value))
+        if checker is None:
+            self.fail(f'We do not handle type {type(expected_value)} in check_literal_expression')
+
+        checker(expression, expected_value)
 
     def check_infix_expression(self, expression, left, operator, right):
-        self.assertEqual(type(expression), ast.InfixExpression)        
+        self.assertIsInstance(expression, ast.InfixExpression)
         self.check_literal_expression(expression.left, left)
         self.assertEqual(expression.operator, operator)
         self.check_literal_expression(expression.right, right)
@@ -68,27 +121,19 @@ class ParserTestCase(unittest.TestCase):
 
     def check_let_statement(self, statement, expected_id):
         self.assertEqual(statement.token_literal(),      'let')
-        self.assertEqual(type(statement),                ast.LetStatement)
+        self.assertIsInstance(statement, ast.LetStatement)
         self.assertEqual(statement.name.value,           expected_id)
         self.assertEqual(statement.name.token_literal(), expected_id)        
 
     def test_let_statements(self):
-        @dataclass
-        class Test:
-            input_string: str
-            expected_identifier: str
-            expected_value: Any
-
         tests = [
-            Test('let x = 5;',      'x',      5),
-            Test('let y = true;',   'y',      True),
-            Test('let foobar = y;', 'foobar', 'y')
+            LetTest('let x = 5;',      'x',      5),
+            LetTest('let y = true;',   'y',      True),
+            LetTest('let foobar = y;', 'foobar', 'y')
         ]
 
         for test in tests:
-            lexer = Lexer(test.input_string)
-            parser = Parser(lexer)
-            program = parser.parse_program()
+            parser, program = _parse(test.input_string)
 
             self.check_parse_errors(parser)
             self.assertIsNotNone(program)
@@ -105,21 +150,14 @@ class ParserTestCase(unittest.TestCase):
     #############################
 
     def test_return_statements(self):
-        @dataclass
-        class Test:
-            input_string: str
-            expected_value: Any
-
         tests = [
-            Test('return 5;',      5),
-            Test('return true;',   True),
-            Test('return foobar;', 'foobar')
+            ReturnTest('return 5;',      5),
+            ReturnTest('return true;',   True),
+            ReturnTest('return foobar;', 'foobar')
         ]
 
         for test in tests:
-            lexer = Lexer(test.input_string)
-            parser = Parser(lexer)
-            program = parser.parse_program()
+            parser, program = _parse(test.input_string)
 
             self.check_parse_errors(parser)
             self.assertIsNotNone(program)
@@ -135,17 +173,8 @@ class ParserTestCase(unittest.TestCase):
     def test_identifier_expression(self):
         input_string = 'foobar;'
 
-        lexer = Lexer(input_string)
-        parser = Parser(lexer)
-        program = parser.parse_program()
-
-        self.check_parse_errors(parser)
-        self.assertIsNotNone(program)
-        self.assertEqual(len(program.statements), 1)
-
-        stmt = program.statements[0]
-        self.assertEqual(type(stmt), ast.ExpressionStatement)
-        self.check_identifier(stmt.expression, 'foobar')
+        expr = self.parse_single_expression(input_string)
+        self.check_identifier(expr, 'foobar')
 
     ########################################
     # Testing interger literal expressions #
@@ -154,17 +183,8 @@ class ParserTestCase(unittest.TestCase):
     def test_integer_literal_expression(self):
         input_string = '5;'
 
-        lexer = Lexer(input_string)
-        parser = Parser(lexer)
-        program = parser.parse_program()
-
-        self.check_parse_errors(parser)
-        self.assertIsNotNone(program)
-        self.assertEqual(len(program.statements), 1)
-
-        stmt = program.statements[0]
-        self.assertEqual(type(stmt), ast.ExpressionStatement)
-        self.check_integer_literal(stmt.expression, 5)
+        expr = self.parse_single_expression(input_string)
+        self.check_integer_literal(expr, 5)
 
     ######################################
     # Testing string literal expressions #
@@ -173,104 +193,63 @@ class ParserTestCase(unittest.TestCase):
     def test_string_literal_expression(self):
         input_string = '"foobar";'
 
-        lexer = Lexer(input_string)
-        parser = Parser(lexer)
-        program = parser.parse_program()
-
-        self.check_parse_errors(parser)
-        self.assertIsNotNone(program)
-        self.assertEqual(len(program.statements), 1)
-
-        stmt = program.statements[0]
-        self.assertEqual(type(stmt), ast.ExpressionStatement)
-        self.check_string_literal(stmt.expression, "foobar")
+        expr = self.parse_single_expression(input_string)
+        self.check_string_literal(expr, "foobar")
 
     #######################################
     # Testing boolean literal expressions #
     #######################################
 
     def test_boolean_expression(self):
-        @dataclass
-        class Test:
-            input_string: str
-            expected_boolean: bool
-        
         tests = [
-            Test('true;', True),
-            Test('false;', False)
+            BoolTest('true;', True),
+            BoolTest('false;', False)
         ]
 
-        for test in tests:
-            lexer = Lexer(test.input_string)
-            parser = Parser(lexer)
-            program = parser.parse_program()
-
-            self.check_parse_errors(parser)
-            self.assertIsNotNone(program)
-            self.assertEqual(len(program.statements), 1)
-
-            stmt = program.statements[0]
-            self.assertEqual(type(stmt), ast.ExpressionStatement)
-            self.check_boolean_literal(stmt.expression, test.expected_boolean)
+        statements = self.parse_batch([test.input_string for test in tests])
+        for test, stmt in zip(tests, statements):
+            with self.subTest(input=test.input_string):
+                self.assertIsInstance(stmt, ast.ExpressionStatement)
+                self.check_boolean_literal(stmt.expression, test.expected_boolean)
 
     ###################################
     # Testing conditional expressions #
     ###################################
 
-    def test_if_expression(self):
-        input_string = 'if (x < y) { x }'
-
-        lexer = Lexer(input_string)
-        parser = Parser(lexer)
-        program = parser.parse_program()
-
-        self.check_parse_errors(parser)
-        self.assertIsNotNone(program)
-        self.assertEqual(len(program.statements), 1)
-
-        expr = program.statements[0].expression
-        self.assertEqual(type(expr), ast.IfExpression)
+    def check_if_consequence(self, expr):
+        # Condition and consequence of 'if (x < y) { x }', shared by the if and
+        # if/else tests
+        self.assertIsInstance(expr, ast.IfExpression)
         self.check_infix_expression(expr.condition, 'x', '<', 'y')
 
         consequences = expr.consequence
-        self.assertEqual(type(consequences), ast.BlockStatement)
+        self.assertIsInstance(consequences, ast.BlockStatement)
         self.assertEqual(len(consequences.statements), 1)
 
         consequence = consequences.statements[0]
-        self.assertEqual(type(consequence), ast.ExpressionStatement)
+        self.assertIsInstance(consequence, ast.ExpressionStatement)
         self.check_identifier(consequence.expression, 'x')
 
+    def test_if_expression(self):
+        input_string = 'if (x < y) { x }'
+
+        expr = self.parse_single_expression(input_string)
+        self.check_if_consequence(expr)
+
         self.assertIsNone(expr.alternative)
 
     def test_if_else_expression(self):
         input_string = 'if (x < y) { x } else { y }'
 
-        lexer = Lexer(input_string)
-        parser = Parser(lexer)
-        program = parser.parse_program()
-
-        self.check_parse_errors(parser)
-        self.assertIsNotNone(program)
-        self.assertEqual(len(program.statements), 1)
-
-        expr = program.statements[0].expression
-        self.assertEqual(type(expr), ast.IfExpression)
-        self.check_infix_expression(expr.condition, 'x', '<', 'y')
-
-        consequences = expr.consequence
-        self.assertEqual(type(consequences), ast.BlockStatement)
-        self.assertEqual(len(consequences.statements), 1)
-
-        consequence = consequences.statements[0]
-        self.assertEqual(type(consequence), ast.ExpressionStatement)
-        self.check_identifier(consequence.expression, 'x')
+        expr = self.parse_single_expression(input_string)
+        self.check_if_consequence(expr)
 
         alternatives = expr.alternative
-        self.assertEqual(type(alternatives), ast.BlockStatement)
+        self.assertIsInstance(alternatives, ast.BlockStatement)
         self.assertEqual(len(alternatives.statements), 1)
 
         alternative = alternatives.statements[0]
-        self.assertEqual(type(alternative), ast.ExpressionStatement)
+        self.assertIsInstance(alternative, ast.ExpressionStatement)
         self.check_identifier(alternative.expression, 'y')
 
     ################################
@@ -280,63 +259,43 @@ class ParserTestCase(unittest.TestCase):
     def test_function_literal_parsing(self):
         input_string = 'fn(x, y) { x + y; }'
 
-        lexer = Lexer(input_string)
-        parser = Parser(lexer)
-        program = parser.parse_program()
-
-        self.check_parse_errors(parser)
-        self.assertIsNotNone(program)
-        self.assertEqual(len(program.statements), 1)
-
-        stmt = program.statements[0]
-        self.assertTrue(type(stmt), ast.ExpressionStatement)
-
-        function = stmt.expression
-        self.assertTrue(type(function), ast.FunctionLiteral)
+        function = self.parse_single_expression(input_string)
+        self.assertIsInstance(function, ast.FunctionLiteral)
         
-        self.assertTrue(len(function.parameters), 2)
+        self.assertEqual(len(function.parameters), 2)
         self.check_literal_expression(function.parameters[0], 'x')
         self.check_literal_expression(function.parameters[1], 'y')
 
-        self.assertTrue(len(function.body.statements), 1)
+        self.assertEqual(len(function.body.statements), 1)
         body_stmt = function.body.statements[0]
-        self.assertTrue(type(body_stmt), ast.ExpressionStatement)
+        self.assertIsInstance(body_stmt, ast.ExpressionStatement)
         self.check_infix_expression(body_stmt.expression, 'x', '+', 'y')
     
     def test_function_literal_with_name(self):
         input_string = 'let myFunction = fn() { };'
 
-        lexer = Lexer(input_string)
-        parser = Parser(lexer)
-        program = parser.parse_program()
+        parser, program = _parse(input_string)
 
         self.check_parse_errors(parser)
         self.assertIsNotNone(program)
         self.assertEqual(len(program.statements), 1)
 
         stmt = program.statements[0]
-        self.assertTrue(type(stmt), ast.LetStatement)
+        self.assertIsInstance(stmt, ast.LetStatement)
 
         function = stmt.value
-        self.assertTrue(type(function), ast.FunctionLiteral)
+        self.assertIsInstance(function, ast.FunctionLiteral)
         self.assertEqual(function.name, 'myFunction')
 
     def test_function_parameters_parsing(self):
-        @dataclass
-        class Test:
-            input_string: str
-            expected_params: list[str]
-        
         tests = [
-            Test('fn() {};', []),
-            Test('fn(x) {};', ['x']),
-            Test('fn(x, y, z) {};', ['x', 'y', 'z'])
+            ParamsTest('fn() {};', []),
+            ParamsTest('fn(x) {};', ['x']),
+            ParamsTest('fn(x, y, z) {};', ['x', 'y', 'z'])
         ]
 
         for test in tests:
-            lexer = Lexer(test.input_string)
-            parser = Parser(lexer)
-            program = parser.parse_program()
+            parser, program = _parse(test.input_string)
 
             self.check_parse_errors(parser)
 
@@ -350,19 +309,8 @@ class ParserTestCase(unittest.TestCase):
     def test_call_expression_parsing(self):
         input_string = 'add(1, 2 * 3, 4 + 5);'
 
-        lexer = Lexer(input_string)
-        parser = Parser(lexer)
-        program = parser.parse_program()
-
-        self.check_parse_errors(parser)
-        self.assertIsNotNone(program)
-        self.assertEqual(len(program.statements), 1)
-
-        stmt = program.statements[0]
-        self.assertTrue(type(stmt), ast.ExpressionStatement)
-
-        call_expression = stmt.expression
-        self.assertEqual(type(call_expression), ast.CallExpression)
+        call_expression = self.parse_single_expression(input_string)
+        self.assertIsInstance(call_expression, ast.CallExpression)
         self.check_identifier(call_expression.function, 'add')
         
         self.assertEqual(len(call_expression.arguments), 3)
@@ -377,19 +325,8 @@ class ParserTestCase(unittest.TestCase):
     def test_array_literal_expressions(self):
         input_string = '[1, 2 * 2, 3 + 3]'
 
-        lexer = Lexer(input_string)
-        parser = Parser(lexer)
-        program = parser.parse_program()
-
-        self.check_parse_errors(parser)
-        self.assertIsNotNone(program)
-        self.assertEqual(len(program.statements), 1)
-
-        stmt = program.statements[0]
-        self.assertEqual(type(stmt), ast.ExpressionStatement)
-
-        array = stmt.expression
-        self.assertEqual(type(array), ast.ArrayLiteral)
+        array = self.parse_single_expression(input_string)
+        self.assertIsInstance(array, ast.ArrayLiteral)
         self.assertEqual(len(array.elements), 3)
         self.check_integer_literal(array.elements[0], 1)
         self.check_infix_expression(array.elements[1], 2, '*', 2)
@@ -398,19 +335,8 @@ class ParserTestCase(unittest.TestCase):
     def test_parsing_index_expressions(self):
         input_string = 'myArray[1 + 1]'
 
-        lexer = Lexer(input_string)
-        parser = Parser(lexer)
-        program = parser.parse_program()
-
-        self.check_parse_errors(parser)
-        self.assertIsNotNone(program)
-        self.assertEqual(len(program.statements), 1)
-
-        stmt = program.statements[0]
-        self.assertEqual(type(stmt), ast.ExpressionStatement)
-
-        index_exp = stmt.expression
-        self.assertEqual(type(index_exp), ast.IndexExpression)
+        index_exp = self.parse_single_expression(input_string)
+        self.assertIsInstance(index_exp, ast.IndexExpression)
         self.check_identifier(index_exp.left, 'myArray')
         self.check_infix_expression(index_exp.index, 1, '+', 1)
 
@@ -427,23 +353,12 @@ class ParserTestCase(unittest.TestCase):
             'four': 4
         }
 
-        lexer = Lexer(input_string)
-        parser = Parser(lexer)
-        program = parser.parse_program()
-
-        self.check_parse_errors(parser)
-        self.assertIsNotNone(program)
-        self.assertEqual(len(program.statements), 1)
-
-        stmt = program.statements[0]
-        self.assertEqual(type(stmt), ast.ExpressionStatement)
-
-        hush = stmt.expression
-        self.assertEqual(type(hush), ast.HashLiteral)
+        hush = self.parse_single_expression(input_string)
+        self.assertIsInstance(hush, ast.HashLiteral)
         self.assertEqual(len(hush.pairs), 3)
 
         for key, value in hush.pairs.items():
-            self.assertTrue(type(key), ast.StringLiteral)
+            self.assertIsInstance(key, ast.StringLiteral)
 
             expected_value = expected[str(key)]
             self.check_integer_literal(value, expected_value)
@@ -451,19 +366,8 @@ class ParserTestCase(unittest.TestCase):
     def test_parsing_empty_hash_literal(self):
         input_string = '{}'
 
-        lexer = Lexer(input_string)
-        parser = Parser(lexer)
-        program = parser.parse_program()
-
-        self.check_parse_errors(parser)
-        self.assertIsNotNone(program)
-        self.assertEqual(len(program.statements), 1)
-
-        stmt = program.statements[0]
-        self.assertEqual(type(stmt), ast.ExpressionStatement)
-
-        hush = stmt.expression
-        self.assertEqual(type(hush), ast.HashLiteral)
+        hush = self.parse_single_expression(input_string)
+        self.assertIsInstance(hush, ast.HashLiteral)
         self.assertEqual(len(hush.pairs), 0)
 
     ##############################
@@ -471,12 +375,6 @@ class ParserTestCase(unittest.TestCase):
     ##############################
 
     def test_parsing_prefix_expressions(self):
-        @dataclass
-        class PrefixTest:
-            input_string: str
-            operator: str
-            right_value: Any
-
         prefix_tests = [
             PrefixTest('!5',      '!', 5),
             PrefixTest('-15',     '-', 15),
@@ -484,35 +382,21 @@ class ParserTestCase(unittest.TestCase):
             PrefixTest('!false;', '!', False),
         ]
 
-        for test in prefix_tests:
-            lexer = Lexer(test.input_string)
-            parser = Parser(lexer)
-            program = parser.parse_program()
-
-            self.check_parse_errors(parser)
-            self.assertIsNotNone(program)
-            self.assertEqual(len(program.statements), 1)
-
-            stmt = program.statements[0]
-            self.assertEqual(type(stmt), ast.ExpressionStatement)
+        statements = self.parse_batch([test.input_string for test in prefix_tests])
+        for test, stmt in zip(prefix_tests, statements):
+            with self.subTest(input=test.input_string):
+                self.assertIsInstance(stmt, ast.ExpressionStatement)
 
-            exp = stmt.expression
-            self.assertEqual(type(exp), ast.PrefixExpression)
-            self.assertEqual(exp.operator, test.operator)
-            self.check_literal_expression(exp.right, test.right_value)
+                exp = stmt.expression
+                self.assertIsInstance(exp, ast.PrefixExpression)
+                self.assertEqual(exp.operator, test.operator)
+                self.check_literal_expression(exp.right, test.right_value)
 
     #############################
     # Testing infix expressions #
     #############################
 
     def test_parsing_infix_expressions(self):
-        @dataclass
-        class InfixTest:
-            input_string: str
-            left_value: Any
-            operator: str
-            right_value: Any
-
         infix_tests = [
             InfixTest('5 + 5;',         5,    '+',   5),
             InfixTest('5 - 5;',         5,    '-',   5),
@@ -527,62 +411,66 @@ class ParserTestCase(unittest.TestCase):
             InfixTest('false == false', False, '==', False),
         ]
 
-        for test in infix_tests:
-            lexer = Lexer(test.input_string)
-            parser = Parser(lexer)
-            program = parser.parse_program()
-
-            self.check_parse_errors(parser)
-            self.assertIsNotNone(program)
-            self.assertEqual(len(program.statements), 1)
-
-            stmt = program.statements[0]
-            self.assertEqual(type(stmt), ast.ExpressionStatement)
-            self.check_infix_expression(stmt.expression, test.left_value, test.operator, test.right_value)
+        statements = self.parse_batch([test.input_string for test in infix_tests])
+        for test, stmt in zip(infix_tests, statements):
+            with self.subTest(input=test.input_string):
+                self.assertIsInstance(stmt, ast.ExpressionStatement)
+                self.check_infix_expression(stmt.expression, test.left_value, test.operator, test.right_value)
 
     def test_operator_precedence_parsing(self):
-        @dataclass
-        class Test:
-            input_string: str
-            expected: str
-
         tests = [
-            Test('-a * b',                             '((-a) * b)'),
-            Test('!-a',                                '(!(-a))'),
-            Test('a + b + c',                          '((a + b) + c)'),
-            Test('a + b - c',                          '((a + b) - c)'),
-            Test('a * b * c',                          '((a * b) * c)'),
-            Test('a * b / c',                          '((a * b) / c)'),
-            Test('a + b / c',                          '(a + (b / c))'),
-            Test('a + b * c + d / e - f',              '(((a + (b * c)) + (d / e)) - f)'),
-            Test('3 + 4; -5 * 5',                      '(3 + 4)((-5) * 5)'),
-            Test('5 > 4 == 3 < 4',                     '((5 > 4) == (3 < 4))'),
-            Test('5 < 4 != 3 > 4',                     '((5 < 4) != (3 > 4))'),
-            Test('3 + 4 * 5 == 3 * 1 + 4 * 5',         '((3 + (4 * 5)) == ((3 * 1) + (4 * 5)))'),
-            Test('3 + 4 * 5 == 3 * 1 + 4 * 5',         '((3 + (4 * 5)) == ((3 * 1) + (4 * 5)))'),
-            Test('true',                               'True'),
-            Test('false',                              'False'),
-            Test('3 > 5 == false',                     '((3 > 5) == False)'),
-            Test('3 < 5 == true',                      '((3 < 5) == True)'),
-            Test('1 + (2 + 3) + 4',                    '((1 + (2 + 3)) + 4)'),
-            Test('(5 + 5) * 2',                        '((5 + 5) * 2)'),
-            Test('2 / (5 + 5)',                        '(2 / (5 + 5))'),
-            Test('-(5 + 5)',                           '(-(5 + 5))'),
-            Test('!(true == true)',                    '(!(True == True))'),
-            Test('a * [1, 2, 3, 4][b * c] * d',        '((a * ([1, 2, 3, 4][(b * c)])) * d)'),
-            Test('add(a * b[2], b[1], 2 * [1, 2][1])', 'add((a * (b[2])), (b[1]), (2 * ([1, 2][1])))'),
+            PrecedenceTest('-a * b',                             '((-a) * b)'),
+            PrecedenceTest('!-a',                                '(!(-a))'),
+            PrecedenceTest('a + b + c',                          '((a + b) + c)'),
+            PrecedenceTest('a + b - c',                          '((a + b) - c)'),
+            PrecedenceTest('a * b * c',                          '((a * b) * c)'),
+            PrecedenceTest('a * b / c',                          '((a * b) / c)'),
+            PrecedenceTest('a + b / c',                          '(a + (b / c))'),
+            PrecedenceTest('a + b * c + d / e - f',              '(((a + (b * c)) + (d / e)) - f)'),
+            PrecedenceTest('3 + 4; -5 * 5',                      '(3 + 4)((-5) * 5)'),
+            PrecedenceTest('5 > 4 == 3 < 4',                     '((5 > 4) == (3 < 4))'),
+            PrecedenceTest('5 < 4 != 3 > 4',                     '((5 < 4) != (3 > 4))'),
+            PrecedenceTest('3 + 4 * 5 == 3 * 1 + 4 * 5',         '((3 + (4 * 5)) == ((3 * 1) + (4 * 5)))'),
+            PrecedenceTest('3 + 4 * 5 == 3 * 1 + 4 * 5',         '((3 + (4 * 5)) == ((3 * 1) + (4 * 5)))'),
+            PrecedenceTest('true',                               'True'),
+            PrecedenceTest('false',                              'False'),
+            PrecedenceTest('3 > 5 == false',                     '((3 > 5) == False)'),
+            PrecedenceTest('3 < 5 == true',                      '((3 < 5) == True)'),
+            PrecedenceTest('1 + (2 + 3) + 4',                    '((1 + (2 + 3)) + 4)'),
+            PrecedenceTest('(5 + 5) * 2',                        '((5 + 5) * 2)'),
+            PrecedenceTest('2 / (5 + 5)',                        '(2 / (5 + 5))'),
+            PrecedenceTest('-(5 + 5)',                           '(-(5 + 5))'),
+            PrecedenceTest('!(true == true)',                    '(!(True == True))'),
+            PrecedenceTest('a * [1, 2, 3, 4][b * c] * d',        '((a * ([1, 2, 3, 4][(b * c)])) * d)'),
+            PrecedenceTest('add(a * b[2], b[1], 2 * [1, 2][1])', 'add((a * (b[2])), (b[1]), (2 * ([1, 2][1])))'),
         ]
 
         for test in tests:
-            lexer = Lexer(test.input_string)
-            parser = Parser(lexer)
-            program = parser.parse_program()
+            with self.subTest(input=test.input_string):
+                parser, program = _parse(test.input_string)
 
-            self.check_parse_errors(parser)
-            self.assertIsNotNone(program)      
+                self.check_parse_errors(parser)
+                self.assertIsNotNone(program)
+
+                actual = str(program)
+                self.assertEqual(actual, test.expected)
+
+    ########################
+    # Testing parser reuse #
+    ########################
+
+    def test_reset(self):
+        parser = Parser(Lexer('let = 5;'))
+        parser.parse_program()
+        self.assertNotEqual(len(parser.get_errors()), 0)
 
-            actual = str(program)
-            self.assertEqual(actual, test.expected)
+        parser.reset(Lexer('let x = 5;'))
+        program = parser.parse_program()
+
+        self.check_parse_errors(parser)
+        self.assertEqual(len(program.statements), 1)
+        self.check_let_statement(program.statements[0], 'x')
+        self.check_literal_expression(program.statements[0].value, 5)
 
 
 
@@ -1,18 +1,72 @@
 import unittest
-from dataclasses import dataclass
-from typing import List
+from typing import List, NamedTuple
 
 from monkey.symbol_table import Symbol, SymbolTable, GlobalScope, LocalScope, BuiltinScope, FreeScope, FunctionScope
 
+
+# The symbols most tests expect, built once. Symbols compare by value, so
+# sharing them between tests changes nothing.
+_GLOBAL_A = Symbol(name='a', scope=GlobalScope, index=0)
+_GLOBAL_B = Symbol(name='b', scope=GlobalScope, index=1)
+_LOCAL_C  = Symbol(name='c', scope=LocalScope,  index=0)
+_LOCAL_D  = Symbol(name='d', scope=LocalScope,  index=1)
+_LOCAL_E  = Symbol(name='e', scope=LocalScope,  index=0)
+_LOCAL_F  = Symbol(name='f', scope=LocalScope,  index=1)
+_FREE_C   = Symbol(name='c', scope=FreeScope,   index=0)
+_FREE_D   = Symbol(name='d', scope=FreeScope,   index=1)
+
+
+class ResolveTest(NamedTuple):
+    table: SymbolTable
+    expected_symbols: List[Symbol]
+
+
+class FreeTest(NamedTuple):
+    table: SymbolTable
+    expected_symbols: List[Symbol]
+    expected_free_symbols: List[Symbol]
+
+
 class TestSymbolTable(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # The global -> local -> nested local chain shared by the resolve tests.
+        # Those only resolve global and local names, which never defines free
+        # symbols, so the tables are left as they were built.
+        cls.global_table = SymbolTable()
+        cls.global_table.define('a')
+        cls.global_table.define('b')
+
+        cls.first_local_table = SymbolTable(outer=cls.global_table)
+        cls.first_local_table.define('c')
+        cls.first_local_table.define('d')
+
+        cls.second_local_table = SymbolTable(outer=cls.first_local_table)
+        cls.second_local_table.define('e')
+        cls.second_local_table.define('f')
+
+    def check_resolve(self, table: SymbolTable, expected: Symbol) -> None:
+        # The messages are only formatted once a check has already failed
+        result = table.resolve(expected.name)
+        if result is None:
+            self.fail(f'name {expected.name} not resolvable')
+
+        if result != expected:
+            self.fail(f'expected {expected.name} to resolve to {expected}, got {result}')
+
+    def check_resolve_all(self, table: SymbolTable, expected: List[Symbol]) -> None:
+        # One list comparison for a table without free symbols; the list diff
+        # still points at the names that resolved wrong
+        self.assertEqual([table.resolve(sym.name) for sym in expected], expected)
+
     def test_define(self):
         expected = {
-            'a': Symbol(name='a', scope=GlobalScope, index=0),
-            'b': Symbol(name='b', scope=GlobalScope, index=1),
-            'c': Symbol(name='c', scope=LocalScope, index=0),
-            'd': Symbol(name='d', scope=LocalScope, index=1),
-            'e': Symbol(name='e', scope=LocalScope, index=0),
-            'f': Symbol(name='f', scope=LocalScope, index=1),
+            'a': _GLOBAL_A,
+            'b': _GLOBAL_B,
+            'c': _LOCAL_C,
+            'd': _LOCAL_D,
+            'e': _LOCAL_E,
+            'f': _LOCAL_F,
         }
 
         global_table = SymbolTable()
@@ -40,81 +94,50 @@ class TestSymbolTable(unittest.TestCase):
         self.assertEqual(f, expected['f'])
 
     def test_resolve(self):
-        global_table = SymbolTable()
-        a = global_table.define('a')
-        b = global_table.define('b')
+        global_table = self.global_table
 
         expected = [
-            Symbol(name='a', scope=GlobalScope, index=0),
-            Symbol(name='b', scope=GlobalScope, index=1),
+            _GLOBAL_A,
+            _GLOBAL_B,
         ]
 
-        for sym in expected:
-            result = global_table.resolve(sym.name)           
-            self.assertIsNotNone(result, f'symbol {sym.name} not resolvable')
-            self.assertEqual(result, sym, f'expected {sym.name} to resolve to {sym} but got {result}')
+        self.check_resolve_all(global_table, expected)
 
     def test_resolve_local(self):
-        global_table = SymbolTable()
-        global_table.define('a')
-        global_table.define('b')
-
-        local_table = SymbolTable(outer=global_table)
-        local_table.define('c')
-        local_table.define('d')
+        local_table = self.first_local_table
 
         expected = [
-            Symbol(name='a', scope=GlobalScope, index=0),
-            Symbol(name='b', scope=GlobalScope, index=1),
-            Symbol(name='c', scope=LocalScope, index=0),
-            Symbol(name='d', scope=LocalScope, index=1),
+            _GLOBAL_A,
+            _GLOBAL_B,
+            _LOCAL_C,
+            _LOCAL_D,
         ]
 
-        for sym in expected:
-            result = local_table.resolve(sym.name)
-            self.assertIsNotNone(result, f'name {sym.name} not resolvable')
-            self.assertEqual(result, sym, f'expected {sym.name} to resolve to {sym} but got {result}')
+        self.check_resolve_all(local_table, expected)
 
     def test_resolve_nested_local(self):
-        global_table = SymbolTable()
-        global_table.define('a')
-        global_table.define('b')
-
-        first_local_table = SymbolTable(outer=global_table)
-        first_local_table.define('c')
-        first_local_table.define('d')
-
-        second_local_table = SymbolTable(outer=first_local_table)
-        second_local_table.define('e')
-        second_local_table.define('f')
-
-        @dataclass
-        class TestCase:
-            table: SymbolTable
-            expeced_symbols: List[Symbol]
+        first_local_table = self.first_local_table
+        second_local_table = self.second_local_table
 
         tests = [
-            TestCase(table=first_local_table,
-                     expeced_symbols=[
-                        Symbol(name='a', scope=GlobalScope, index=0),
-                        Symbol(name='b', scope=GlobalScope, index=1),
-                        Symbol(name='c', scope=LocalScope, index=0),
-                        Symbol(name='d', scope=LocalScope, index=1),
-                     ]),
-            TestCase(table=second_local_table,
-                     expeced_symbols=[
-                        Symbol(name='a', scope=GlobalScope, index=0),
-                        Symbol(name='b', scope=GlobalScope, index=1),
-                        Symbol(name='e', scope=LocalScope, index=0),
-                        Symbol(name='f', scope=LocalScope, index=1),
-                     ]),
+            ResolveTest(table=first_local_table,
+                        expected_symbols=[
+                           _GLOBAL_A,
+                           _GLOBAL_B,
+                           _LOCAL_C,
+                           _LOCAL_D,
+                        ]),
+            ResolveTest(table=second_local_table,
+                        expected_symbols=[
+                           _GLOBAL_A,
+                           _GLOBAL_B,
+                           _LOCAL_E,
+                           _LOCAL_F,
+                        ]),
         ]
 
         for test in tests:
-            for sym in test.expeced_symbols:
-                result = test.table.resolve(sym.name)
-                self.assertIsNotNone(result, f'name {sym.name} not resolvable')
-                self.assertEqual(result, sym, f'expected {sym.name} to resolve to {sym} but got {result}')
+            self.check_resolve_all(test.table, test.expected_symbols)
 
     def test_define_resolve_builtin(self):
         global_table = SymbolTable()
@@ -133,13 +156,7 @@ class TestSymbolTable(unittest.TestCase):
         
         for table in [global_table, first_local_table, second_local_table]:
             for sym in expected:
-                result = table.resolve(sym.name)
-
-                if result is None:
-                    self.fail(f'name {sym.name} not resolvable')
-                
-                if result != sym:
-                    self.fail(f'expected {sym.name} to resolve to {sym}, got {result}')
+                self.check_resolve(table, sym)
 
     def test_resolve_free(self):
         global_table = SymbolTable()
@@ -154,50 +171,38 @@ class TestSymbolTable(unittest.TestCase):
         second_local_table.define('e')
         second_local_table.define('f')
 
-        @dataclass
-        class Test:
-            table: SymbolTable
-            expected_symbols: List[Symbol]
-            expected_free_symbools: List[Symbol]
-
         tests = [
-            Test(table=first_local_table,
-                 expected_symbols=[
-                     Symbol(name='a', scope=GlobalScope, index=0),
-                     Symbol(name='b', scope=GlobalScope, index=1),
-                     Symbol(name='c', scope=LocalScope,  index=0),
-                     Symbol(name='d', scope=LocalScope,  index=1),
-                 ],
-                 expected_free_symbools=[]),
-            Test(table=second_local_table,
-                 expected_symbols=[
-                     Symbol(name='a', scope=GlobalScope, index=0),
-                     Symbol(name='b', scope=GlobalScope, index=1),
-                     Symbol(name='c', scope=FreeScope,   index=0),
-                     Symbol(name='d', scope=FreeScope,   index=1),
-                     Symbol(name='e', scope=LocalScope,  index=0),
-                     Symbol(name='f', scope=LocalScope,  index=1),
-                 ],
-                 expected_free_symbools=[
-                     Symbol(name='c', scope=LocalScope,  index=0),
-                     Symbol(name='d', scope=LocalScope,  index=1),
-                 ]),
+            FreeTest(table=first_local_table,
+                     expected_symbols=[
+                         _GLOBAL_A,
+                         _GLOBAL_B,
+                         _LOCAL_C,
+                         _LOCAL_D,
+                     ],
+                     expected_free_symbols=[]),
+            FreeTest(table=second_local_table,
+                     expected_symbols=[
+                         _GLOBAL_A,
+                         _GLOBAL_B,
+                         _FREE_C,
+                         _FREE_D,
+                         _LOCAL_E,
+                         _LOCAL_F,
+                     ],
+                     expected_free_symbols=[
+                         _LOCAL_C,
+                         _LOCAL_D,
+                     ]),
         ]
 
         for test in tests:
             for sym in test.expected_symbols:
-                result = test.table.resolve(sym.name)
-
-                if result is None:
-                    self.fail(f'name {sym.name} not resolvable')
-
-                if result != sym:
-                    self.fail(f'expected {sym.name} to resolve to {sym}, got {result}')
+                self.check_resolve(test.table, sym)
                 
-            if len(test.table.free_symbols) != len(test.expected_free_symbools):
-                self.fail(f'wrong number of free symbols. got={len(test.table.free_symbols)}, want={len(test.expected_free_symbools)}')
+            if len(test.table.free_symbols) != len(test.expected_free_symbols):
+                self.fail(f'wrong number of free symbols. got={len(test.table.free_symbols)}, want={len(test.expected_free_symbols)}')
 
-            for i, sym in enumerate(test.expected_free_symbools):
+            for i, sym in enumerate(test.expected_free_symbols):
                 result = test.table.free_symbols[i]
                 if result != sym:
                     self.fail(f'wrong free symbol. got={result}, want={sym}')
@@ -214,25 +219,19 @@ class TestSymbolTable(unittest.TestCase):
         second_local_table.define('f')
 
         expected = [
-            Symbol(name='a', scope=GlobalScope, index=0),
-            Symbol(name='c', scope=FreeScope,   index=0),
-            Symbol(name='e', scope=LocalScope,  index=0),
-            Symbol(name='f', scope=LocalScope,  index=1),
+            _GLOBAL_A,
+            _FREE_C,
+            _LOCAL_E,
+            _LOCAL_F,
         ]
 
         for sym in expected:
-            result = second_local_table.resolve(sym.name)
+            self.check_resolve(second_local_table, sym)
 
-            if result is None:
-                self.fail(f'name {sym.name} not resolvable')
-
-            if result != sym:
-                self.fail(f'expected {sym.name} to resolve to {sym}, got {result}')
-            
-            expected_unresolveable = ['b', 'd']
-            for name in expected_unresolveable:
-                if second_local_table.resolve(name) is not None:
-                    self.fail(f'name {name} resolve, but was expected not to')
+        expected_unresolveable = ['b', 'd']
+        for name in expected_unresolveable:
+            if second_local_table.resolve(name) is not None:
+                self.fail(f'name {name} resolve, but was expected not to')
 
     def test_define_and_resolve_function_name(self):
         global_table = SymbolTable()
@@ -253,7 +252,7 @@ class TestSymbolTable(unittest.TestCase):
         global_table.define_function_name('a')
         global_table.define('a')
 
-        expected = Symbol(name='a', scope=GlobalScope, index=0)
+        expected = _GLOBAL_A
 
         result = global_table.resolve(expected.name)
 
@@ -264,6 +263,30 @@ class TestSymbolTable(unittest.TestCase):
             self.fail(f'expected {expected.name} to resolve to {expected}, got {result}')
 
 
+    def test_resolve_cached(self):
+        global_table = SymbolTable()
+        global_table.define('a')
+
+        first_local_table = SymbolTable(global_table)
+        first_local_table.define('c')
+
+        second_local_table = SymbolTable(first_local_table)
+
+        for _ in range(2):
+            self.assertEqual(second_local_table.resolve_cached('a'), _GLOBAL_A)
+            self.assertEqual(second_local_table.resolve_cached('c'), _FREE_C)
+            self.assertIsNone(second_local_table.resolve_cached('b'))
+
+        # The free symbol is only captured once
+        self.assertEqual(second_local_table.free_symbols, [_LOCAL_C])
+
+        # Defining a name on the table replaces what was cached for it
+        second_local_table.define('a')
+        self.assertEqual(second_local_table.resolve_cached('a'), Symbol(name='a', scope=LocalScope, index=0))
+
+        global_table.define('b')
+        self.assertEqual(second_local_table.resolve_cached('b'), _GLOBAL_B)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -1,524 +1,760 @@
+import os
+import pickle
+import hashlib
+import tempfile
 import unittest
 
 from typing import List
-from dataclasses import dataclass
+from functools import lru_cache
+from dataclasses import dataclass, replace
 
 from monkey.object import *
 from monkey.lexer import Lexer
 from monkey.parser import Parser
-from monkey.compiler import Compiler
-from monkey.vm import VirtualMachine
+from monkey.compiler import Compiler, CompilerError, Bytecode
+from monkey.vm import VirtualMachine, fuse_pops, decode
+from monkey import code
 
 
-@dataclass
+# One parser, compiler and VM serve the whole module. Each is reset for the
+# next input rather than rebuilt, which keeps the VM's stack, globals and frame
+# arrays allocated across runs.
+_parser = Parser(Lexer(''))
+_compiler = Compiler()
+_vm = None
+
+
+def _compile(input_string: str) -> tuple[Bytecode | None, CompilerError | None]:
+    _parser.reset(Lexer(input_string))
+    _compiler.reset()
+    return _compiler.compile_to_bytecode(_parser.parse_program())
+
+
+# MONKEY_BC_CACHE=1 also keeps compiled bytecode on disk between runs, like
+# __pycache__ does for python. Entries are keyed on the monkey sources as well
+# as the input, so editing the lexer, parser or compiler invalidates them all.
+if os.environ.get('MONKEY_BC_CACHE') == '1':
+    _CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.monkey_cache')
+
+    def _source_digest() -> bytes:
+        digest = hashlib.sha1()
+        package = os.path.dirname(os.path.abspath(code.__file__))
+        for name in sorted(os.listdir(package)):
+            if name.endswith('.py'):
+                with open(os.path.join(package, name), 'rb') as f:
+                    digest.update(f.read())
+
+        return digest.digest()
+
+    _SOURCE_DIGEST = _source_digest()
+    _compile_from_source = _compile
+
+    def _compile(input_string: str) -> tuple[Bytecode | None, CompilerError | None]:
+        key = hashlib.sha1(_SOURCE_DIGEST + input_string.encode()).hexdigest()
+        path = os.path.join(_CACHE_DIR, f'{key}.pkl')
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f), None
+        except (OSError, pickle.UnpicklingError, EOFError):
+            pass
+
+        bytecode, err = _compile_from_source(input_string)
+        if err is None:
+            # Written under a temporary name and moved into place, so parallel
+            # workers never read a half written file.
+            os.makedirs(_CACHE_DIR, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=_CACHE_DIR)
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(bytecode, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+
+        return bytecode, err
+
+
+# Bytecode for an input is shared by every test that runs it; the VM copies what
+# it changes out of the bytecode, so one compile can back any number of runs.
+_compile = lru_cache(maxsize=4096)(_compile)
+
+
+def _load_vm(bytecode: Bytecode) -> VirtualMachine:
+    global _vm
+    if _vm is None:
+        _vm = VirtualMachine(bytecode)
+    else:
+        _vm.reset(bytecode)
+
+    return _vm
+
+
+# Expected hash keys are plain ints in the tables. Interning their boxed
+# IntegerObject means each distinct key is only built once per run.
+@lru_cache(maxsize=None)
+def _int_obj(value: int) -> IntegerObject:
+    return IntegerObject(value)
+
+
+def _unbox_ints(objs) -> list:
+    return [obj.value if obj.__class__ is IntegerObject else obj for obj in objs]
+
+
+@dataclass(slots=True, frozen=True)
 class VmTestCase:
     input_string: str
     expected: Any
 
 
+# Expected errors, named once and shared by the tables below.
+_ERR_LEN_INT = ErrorObject('argument to "len" not supported, got ObjectType.INTEGER_OBJ')
+_ERR_LEN_ARGS = ErrorObject('wrong number of arguments. got=2, want=1')
+_ERR_FIRST_INT = ErrorObject('argument to "first" must be ARRAY, got ObjectType.INTEGER_OBJ')
+_ERR_LAST_INT = ErrorObject('argument to "last" must be ARRAY, got ObjectType.INTEGER_OBJ')
+_ERR_PUSH_INT = ErrorObject('argument to "push" must be ARRAY, got ObjectType.INTEGER_OBJ')
+
+_ERR_WRONG_ARGS_0_1 = 'wrong number of arguments: want=0, got=1'
+_ERR_WRONG_ARGS_1_0 = 'wrong number of arguments: want=1, got=0'
+_ERR_WRONG_ARGS_2_1 = 'wrong number of arguments: want=2, got=1'
+
+
+_INTEGER_ARITHMETIC_TESTS = (
+    VmTestCase(input_string='1', expected=1),
+    VmTestCase('2', 2),
+    VmTestCase('1 + 2', 3),
+    VmTestCase('1 - 2', -1),
+    VmTestCase('1 * 2', 2),
+    VmTestCase('4 / 2', 2),
+    VmTestCase('50 / 2 * 2 + 10 - 5', 55),
+    VmTestCase('5 + 5 + 5 + 5 - 10', 10),
+    VmTestCase('2 * 2 * 2 * 2 * 2', 32),
+    VmTestCase('5 * 2 + 10', 20),
+    VmTestCase('5 + 2 * 10', 25),
+    VmTestCase('5 * (2 + 10)', 60),
+    VmTestCase('-5', -5),
+    VmTestCase('-10', -10),
+    VmTestCase('-50 + 100 + -50', 0),
+    VmTestCase('(5 + 10 * 2 + 15 / 3) * 2 + -10', 50),
+)
+
+_BOOLEAN_EXPRESSIONS_TESTS = (
+    VmTestCase('true', True),
+    VmTestCase('false', False),
+    VmTestCase('1 < 2', True),
+    VmTestCase('1 > 2', False),
+    VmTestCase('1 < 1', False),
+    VmTestCase('1 > 1', False),
+    VmTestCase('1 == 1', True),
+    VmTestCase('1 != 1', False),
+    VmTestCase('1 == 2', False),
+    VmTestCase('1 != 2', True),
+    VmTestCase('true == true', True),
+    VmTestCase('false == false', True),
+    VmTestCase('true == false', False),
+    VmTestCase('true != false', True),
+    VmTestCase('false != true', True),
+    VmTestCase('(1 < 2) == true', True),
+    VmTestCase('(1 < 2) == false', False),
+    VmTestCase('(1 > 2) == true', False),
+    VmTestCase('(1 > 2) == false', True),
+    VmTestCase('!true', False),
+    VmTestCase('!false', True),
+    VmTestCase('!5', False),
+    VmTestCase('!!true', True),
+    VmTestCase('!!false', False),
+    VmTestCase('!!5', True),
+    VmTestCase('!(if (false) { 5 })', True),
+)
+
+_STRING_EXPRESSIONS_TESTS = (
+    VmTestCase('"monkey"', 'monkey'),
+    VmTestCase('"mon" + "key"', 'monkey'),
+    VmTestCase('"mon" + "key" + "banana"', 'monkeybanana'),
+)
+
+_CONDITIONALS_TESTS = (
+    VmTestCase('if (true) { 10 }', 10),
+    VmTestCase('if (true) { 10 } else { 20 }', 10),
+    VmTestCase('if (false) { 10 } else { 20 }', 20),
+    VmTestCase('if (1) { 10 }', 10),
+    VmTestCase('if (1 < 2) { 10 }', 10),
+    VmTestCase('if (1 < 2) { 10 } else { 20 }', 10),
+    VmTestCase('if (1 > 2) { 10 } else { 20 }', 20),
+    VmTestCase('if (1 > 2) { 10 }', None),
+    VmTestCase('if (false) { 10 }', None),
+    VmTestCase('if ((if (false) { 10 })) { 10 } else { 20 }', 20),
+)
+
+_GLOBAL_LET_STATEMENT_TESTS = (
+    VmTestCase('let one = 1; one', 1),
+    VmTestCase('let one = 1; let two = 2; one + two', 3),
+    VmTestCase('let one = 1; let two = one + one; one + two', 3),
+)
+
+_ARRAY_LITERALS_TESTS = (
+    VmTestCase('[]', []),
+    VmTestCase('[1, 2, 3]', [1, 2, 3]),
+    VmTestCase('[1 + 2, 3 * 4, 5 + 6]', [3, 12, 11]),
+)
+
+_HASH_LITERALS_TESTS = (
+    VmTestCase('{}', {}),
+    VmTestCase('{1: 2, 2: 3}', {1: 2, 2: 3}),
+    VmTestCase('{1 + 1: 2 * 2, 3 + 3: 4 * 4}', {2: 4, 6: 16}),
+)
+
+_INDEX_EXPRESSIONS_TESTS = (
+    VmTestCase("[1, 2, 3][1]", 2),
+    VmTestCase("[1, 2, 3][0 + 2]", 3),
+    VmTestCase("[[1, 1, 1]][0][0]", 1),
+    VmTestCase("[][0]", None),
+    VmTestCase("[1, 2, 3][99]", None),
+    VmTestCase("[1][-1]", None),
+    VmTestCase("{1: 1, 2: 2}[1]", 1),
+    VmTestCase("{1: 1, 2: 2}[2]", 2),
+    VmTestCase("{1: 1}[0]", None),
+    VmTestCase("{}[0]", None),
+    VmTestCase('{"a": 1, "b": 2}["b"]', 2),
+    VmTestCase("{true: 1, 1: 2}[true]", 1),
+    VmTestCase("{1: 1}[true]", None),
+)
+
+_FUNCTION_CALLS_TESTS = (
+    VmTestCase("let fivePlusTen = fn() { 5 + 10 }; fivePlusTen();", 15),
+)
+
+_FUNCTION_CALLS_WITH_BINDINGS_TESTS = (
+    VmTestCase(input_string='''
+                let one = fn() {let one = 1; one };
+                one();
+               ''',
+               expected=1),
+    VmTestCase(input_string='''
+                let oneAndTwo = fn() { let one = 1; let two = 2; one + two; };
+                oneAndTwo();
+               ''',
+               expected=3),
+    VmTestCase(input_string='''
+                let oneAndTwo = fn() { let one = 1; let two = 2; one + two; };
+                let threeAndFour = fn() { let three = 3; let four = 4; three + four; };
+                oneAndTwo() + threeAndFour();
+               ''',
+               expected=10),
+    VmTestCase(input_string='''
+                let firstFoobar = fn() { let foobar = 50; foobar; };
+                let secondFoobar = fn() { let foobar = 100; foobar; };
+                firstFoobar() + secondFoobar();
+               ''',
+               expected=150),
+    VmTestCase(input_string='''
+                let globalSeed = 50;
+                let minusOne = fn() {
+                    let num = 1;
+                    globalSeed - num;
+                }
+                let minusTwo = fn() {
+                    let num = 2;
+                    globalSeed - num;
+                }
+                minusOne() + minusTwo();
+               ''',
+               expected=97),
+)
+
+_FUNCTION_CALLS_WITH_ARGUMENTS_AND_BINDINGS_TESTS = (
+    VmTestCase(input_string='''
+                let identity = fn(a) { a; };
+                identity(4);
+               ''',
+               expected=4),
+    VmTestCase(input_string='''
+                let sum = fn(a, b) { a + b; };
+                sum(1, 2);
+               ''',
+               expected=3),
+    VmTestCase(input_string='''
+                let sum = fn(a, b) {
+                    let c = a + b;
+                    c;
+                };
+                sum(1, 2);
+               ''',
+               expected=3),
+    VmTestCase(input_string='''
+                let sum = fn(a, b) {
+                    let c = a + b;
+                    c;
+                };
+                sum(1, 2) + sum(3, 4);
+               ''',
+               expected=10),
+    VmTestCase(input_string='''
+                let sum = fn(a, b) {
+                    let c = a + b;
+                    c;
+                };
+                let outer = fn() {
+                    sum(1, 2) + sum(3, 4);
+                }
+                outer();
+               ''',
+               expected=10),
+    VmTestCase(input_string='''
+                let globalNum = 10;
+                       
+                let sum = fn(a, b) {
+                    let c = a + b;
+                    c + globalNum;
+                };
+                       
+                let outer = fn() {
+                    sum(1, 2) + sum(3, 4) + globalNum;
+                }
+                       
+                outer() + globalNum;
+               ''',
+               expected=50),
+)
+
+_FUNCTION_CALLS_WITH_WRONG_ARGUMENTS_TESTS = (
+    VmTestCase(input_string='''fn() { 1; }(1);''',
+               expected=_ERR_WRONG_ARGS_0_1),
+    VmTestCase(input_string='''fn(a) { a; }();''',
+               expected=_ERR_WRONG_ARGS_1_0),
+    VmTestCase(input_string='''fn(a, b) { a + b; }(1);''',
+               expected=_ERR_WRONG_ARGS_2_1),
+)
+
+_FIRST_CLASS_FUNCTIONS_TESTS = (
+    VmTestCase(
+        input_string='''
+            let returnsOneReturner = fn() {
+                let returnsOne = fn() { 1; };
+                returnsOne;
+            };
+            returnsOneReturner()();
+        ''',
+        expected=1,
+    ),
+    VmTestCase(
+        input_string='''
+            let one = fn() { 1; };
+            let two = fn() { 2; };
+            let call = fn(f) { f(); };
+            call(one) + call(two) + call(one);
+        ''',
+        expected=4,
+    ),
+)
+
+_BUILTIN_FUNCTIONS_TESTS = (
+    VmTestCase(input_string='''len("")''', expected=0),
+    VmTestCase(input_string='''len("four")''', expected=4),
+    VmTestCase(input_string='''len("hello world")''', expected=11),
+    VmTestCase(input_string='''len(1)''', expected=_ERR_LEN_INT),
+    VmTestCase(input_string='''len("one", "two")''', expected=_ERR_LEN_ARGS),
+    VmTestCase(input_string='''len([1, 2, 3])''', expected=3),
+    VmTestCase(input_string='''len([])''', expected=0),
+    VmTestCase(input_string='''puts("hello", "world")''', expected=NULL),
+    VmTestCase(input_string='''first([1, 2, 3])''', expected=1),
+    VmTestCase(input_string='''first([])''', expected=NULL),
+    VmTestCase(input_string='''first(1)''', expected=_ERR_FIRST_INT),
+    VmTestCase(input_string='''last([1, 2, 3])''', expected=3),
+    VmTestCase(input_string='''last([])''', expected=NULL),
+    VmTestCase(input_string='''last(1)''', expected=_ERR_LAST_INT),
+    VmTestCase(input_string='''rest([1, 2, 3])''', expected=[2, 3]),
+    VmTestCase(input_string='''rest([])''', expected=NULL),
+    VmTestCase(input_string='''push([], 1)''', expected=[1]),
+    VmTestCase(input_string='''push(1, 1)''', expected=_ERR_PUSH_INT),
+)
+
+_CLOSURES_TESTS = (
+    VmTestCase(
+        input_string='''
+            let newClosure = fn(a) {
+                fn() { a; };
+            };
+            let closure = newClosure(99);
+            closure();
+            ''',
+            expected=99),
+    VmTestCase(
+        input_string='''
+            let newAdder = fn(a, b) {
+                fn(c) { a + b + c; };
+            };
+            let adder = newAdder(1, 2);
+            adder(8);
+            ''',
+            expected=11),
+    VmTestCase(
+        input_string='''
+            let newAdder = fn(a, b) {
+                let c = a + b;
+                fn(d) { c + d; };
+            };
+            let adder = newAdder(1, 2);
+            adder(8);
+            ''',
+            expected=11),
+    VmTestCase(
+        input_string='''
+            let newAdderOuter = fn(a, b) {
+                let c = a + b;
+                fn(d) {
+                    let e = d + c;
+                    fn(f) { e + f; };
+                };
+            };
+            let newAdderInner = newAdderOuter(1, 2)
+            let adder = newAdderInner(3);
+            adder(8);
+            ''',
+            expected=14),
+    VmTestCase(
+        input_string='''
+            let a = 1;
+            let newAdderOuter = fn(b) {
+                fn(c) {
+                    fn(d) { a + b + c + d };
+                };
+            };
+            let newAdderInner = newAdderOuter(2)
+            let adder = newAdderInner(3);
+            adder(8);
+            ''',
+            expected=14),
+    VmTestCase(
+        input_string='''
+            let newClosure = fn(a, b) {
+                let one = fn() { a; };
+                let two = fn() { b; };
+                fn() { one() + two(); };
+            };
+            let closure = newClosure(9, 90);
+            closure();
+            ''',
+            expected=99),
+)
+
+_RECURSIVE_FUNCTIONS_TESTS = (
+    VmTestCase(
+        input_string='''
+            let countDown = fn(x) {
+                if (x == 0) {
+                    return 0;
+                } else {
+                    countDown(x - 1);
+                }
+            };
+            countDown(1);
+            ''',
+            expected=0),
+    VmTestCase(
+        input_string='''
+            let countDown = fn(x) {
+                if (x == 0) {
+                    return 0;
+                } else {
+                    countDown(x - 1);
+                }
+            };
+            let wrapper = fn() {
+                countDown(1);
+            };
+            wrapper();
+            ''',
+            expected=0),
+    VmTestCase(
+        input_string='''
+            let wrapper = fn() {
+                let countDown = fn(x) {
+                    if (x == 0) {
+                        return 0;
+                    } else {
+                        countDown(x - 1);
+                    }
+                };
+                countDown(1);
+            };
+            wrapper();
+            ''',
+            expected=0),
+)
+
+_RECURSIVE_FIBONACCI_TESTS = (
+    VmTestCase(
+        input_string='''
+            let fibonacci = fn(x) {
+                if (x == 0) {
+                    return 0;
+                } else {
+                    if (x == 1) {
+                        return 1;
+                    } else {
+                        fibonacci(x - 1) + fibonacci(x - 2);
+                    }
+                }
+            };
+
+            fibonacci(15);
+            ''',
+            expected=610),
+)
+
+_FUSED_EXPRESSION_STATEMENTS_TESTS = (
+    VmTestCase('1 + 2; 3 - 4; 5 * 6; 8 / 2;', 4),
+    VmTestCase('let f = fn() { 1 + 2; 3 * 4 }; f();', 12),
+    VmTestCase('if (true) { 1 } else { 2 + 3 }; 7 - 1;', 6),
+)
+
+
 class TestCompiler(unittest.TestCase):
-    def parse(self, input_string: str) -> ast.Program:
-        lexer = Lexer(input_string)
-        parser = Parser(lexer)
-        return parser.parse_program()
+    def compile(self, input_string: str) -> Bytecode:
+        bytecode, err = _compile(input_string)
+        if err is not None:
+            self.fail(f'compiler error: {err}')
+
+        return bytecode
+
+    def load_vm(self, input_string: str) -> VirtualMachine:
+        return _load_vm(self.compile(input_string))
 
     def check_integer_object(self, expected: int, actual: Object) -> None:
-        self.assertIsInstance(actual, IntegerObject)
-        self.assertEqual(actual.value, expected)
+        if actual.__class__ is not IntegerObject or actual.value != expected:
+            self.fail(f'expected IntegerObject({expected!r}), got {actual!r}')
 
     def check_boolean_object(self, expected: bool, actual: Object) -> None:
-        self.assertIsInstance(actual, BooleanObject)
-        self.assertEqual(actual.value, expected)
+        if actual.__class__ is not BooleanObject or actual.value != expected:
+            self.fail(f'expected BooleanObject({expected!r}), got {actual!r}')
+
+    def check_string_object(self, expected: str, actual: Object) -> None:
+        if actual.__class__ is not StringObject or actual.value != expected:
+            self.fail(f'expected StringObject({expected!r}), got {actual!r}')
+
+    def check_null_object(self, expected: NullObject | None, actual: Object) -> None:
+        self.assertEqual(actual, NULL)
+
+    def check_array_object(self, expected: list, actual: Object) -> None:
+        self.assertIsInstance(actual, ArrayObject)
+        # All-int arrays compare in one go. Anything that isn't an IntegerObject
+        # is left boxed, so it can never equal the int it's compared against.
+        if all(type(elem) is int for elem in expected):
+            self.assertEqual(_unbox_ints(actual.elements), expected)
+            return
+
+        self.assertEqual(len(actual.elements), len(expected))
+        for i, elem in enumerate(expected):
+            self.check_expected_object(elem, actual.elements[i])
+
+    def check_hash_object(self, expected: dict, actual: Object) -> None:
+        self.assertIsInstance(actual, HashObject)
+        # Same shortcut as arrays. Int keys are already unboxed by hash_key().
+        if all(type(key) is int and type(value) is int for key, value in expected.items()):
+            self.assertEqual(dict(zip(actual.pairs, _unbox_ints(actual.pairs.values()))), expected)
+            return
+
+        self.assertEqual(len(actual.pairs), len(expected))
+        for key, value in expected.items():
+            key = hash_key(_int_obj(key))
+            self.assertIn(key, actual.pairs)
+            self.check_expected_object(value, actual.pairs[key])
+
+    def check_error_object(self, expected: ErrorObject, actual: Object) -> None:
+        self.assertIsInstance(actual, ErrorObject)
+        if expected.message != actual.message:
+            self.fail(f'wrong error message. expected={expected.message}, got={actual.message}')
+
+    # Built once with the class, from the plain functions above. Keyed on the
+    # exact type of the expected value, so True is checked as a boolean and not
+    # as an int.
+    _CHECKERS = {
+        int:         check_integer_object,
+        bool:        check_boolean_object,
+        str:         check_string_object,
+        list:        check_array_object,
+        dict:        check_hash_object,
+        type(None):  check_null_object,
+        NullObject:  check_null_object,
+        ErrorObject: check_error_object,
+    }
 
     def check_expected_object(self, expected: Any, actual: Object) -> None:
-        if expected is None:
-            self.assertEqual(actual, NULL)
-        elif type(expected) == int:
-            self.check_integer_object(expected, actual)
-        elif type(expected) == bool:
-            self.check_boolean_object(expected, actual)
-        elif type(expected) == list:
-            self.assertIsInstance(actual, ArrayObject)
-            self.assertEqual(len(actual.elements), len(expected))
-            for i, elem in enumerate(expected):
-                self.check_expected_object(elem, actual.elements[i])
-        elif type(expected) == dict:
-            self.assertIsInstance(actual, HashObject)
-            self.assertEqual(len(actual.pairs), len(expected))
-            for key, value in expected.items():
-                key = IntegerObject(key)
-                self.assertIn(key, actual.pairs)
-                self.check_expected_object(value, actual.pairs[key])
-        elif type(expected) == ErrorObject:
-            if expected.message != actual.message:
-                self.fail(f'wrong error message. expected={expected.message}, got={actual.message}')
+        checker = self._CHECKERS.get(type(expected))
+        if checker is None:
+            self.fail(f'no check for expected values of type {type(expected)}')
+
+        checker(self, expected, actual)
     
     def run_vm_tests(self, tests: List[VmTestCase]) -> None:
+        # Bound once for the loop; failure messages are only formatted when a
+        # case actually fails.
+        sub_test, load_vm, check = self.subTest, self.load_vm, self.check_expected_object
+        for test in tests:
+            with sub_test(input=test.input_string):
+                vm = load_vm(test.input_string)
+                err = vm.run()
+                if err is not None:
+                    self.fail(f'vm error: {err}')
+
+                check(test.expected, vm.last_popped_stack_elem())
+
+    # For programs where vm.run() itself fails. The expected value is the error
+    # message, and the stack is never inspected since nothing valid is left on
+    # it. Builtins that return an ErrorObject don't go through here, that's an
+    # ordinary value for run_vm_tests.
+    def run_vm_error_tests(self, tests: List[VmTestCase]) -> None:
         for test in tests:
-            program = self.parse(test.input_string)
-            compiler = Compiler()
-            err = compiler.compile(program)
-            if err is not None:
-                self.fail(f'compiler error: {err}')
-            
-            vm = VirtualMachine(compiler.bytecode())
-            err = vm.run()
-            if err is not None:
-                self.fail(f'vm error: {err}')
-            
-            stack_elem = vm.last_popped_stack_elem()
-            self.check_expected_object(test.expected, stack_elem)
+            with self.subTest(input=test.input_string):
+                err = self.load_vm(test.input_string).run()
+                if err is None:
+                    self.fail('expected VM error but resulted in none.')
 
-    def test_integer_arithmetic(self) -> None:
-        tests = [
-            VmTestCase(input_string='1', expected=1),
-            VmTestCase('2', 2),
-            VmTestCase('1 + 2', 3),
-            VmTestCase('1 - 2', -1),
-            VmTestCase('1 * 2', 2),
-            VmTestCase('4 / 2', 2),
-            VmTestCase('50 / 2 * 2 + 10 - 5', 55),
-            VmTestCase('5 + 5 + 5 + 5 - 10', 10),
-            VmTestCase('2 * 2 * 2 * 2 * 2', 32),
-            VmTestCase('5 * 2 + 10', 20),
-            VmTestCase('5 + 2 * 10', 25),
-            VmTestCase('5 * (2 + 10)', 60),
-            VmTestCase('-5', -5),
-            VmTestCase('-10', -10),
-            VmTestCase('-50 + 100 + -50', 0),
-            VmTestCase('(5 + 10 * 2 + 15 / 3) * 2 + -10', 50),
-        ]
+                if str(err) != test.expected:
+                    self.fail(f'wrong VM error: want={test.expected}, got={err}')
 
-        self.run_vm_tests(tests)
+    def test_integer_arithmetic(self) -> None:
+        self.run_vm_tests(_INTEGER_ARITHMETIC_TESTS)
     
     def test_boolean_expressions(self) -> None:
-        tests = [
-            VmTestCase('true', True),
-            VmTestCase('false', False),
-            VmTestCase('1 < 2', True),
-            VmTestCase('1 > 2', False),
-            VmTestCase('1 < 1', False),
-            VmTestCase('1 > 1', False),
-            VmTestCase('1 == 1', True),
-            VmTestCase('1 != 1', False),
-            VmTestCase('1 == 2', False),
-            VmTestCase('1 != 2', True),
-            VmTestCase('true == true', True),
-            VmTestCase('false == false', True),
-            VmTestCase('true == false', False),
-            VmTestCase('true != false', True),
-            VmTestCase('false != true', True),
-            VmTestCase('(1 < 2) == true', True),
-            VmTestCase('(1 < 2) == false', False),
-            VmTestCase('(1 > 2) == true', False),
-            VmTestCase('(1 > 2) == false', True),
-            VmTestCase('!true', False),
-            VmTestCase('!false', True),
-            VmTestCase('!5', False),
-            VmTestCase('!!true', True),
-            VmTestCase('!!false', False),
-            VmTestCase('!!5', True),
-            VmTestCase('!(if (false) { 5 })', True),
-        ]
-
-        self.run_vm_tests(tests)
+        self.run_vm_tests(_BOOLEAN_EXPRESSIONS_TESTS)
 
     def test_string_expressions(self) -> None:
-        tests = [
-            VmTestCase('"monkey"', 'monkey'),
-            VmTestCase('"mon" + "key"', 'monkey'),
-            VmTestCase('"mon" + "key" + "banana"', 'monkeybanana'),
-        ]
-
-        self.run_vm_tests(tests)
+        self.run_vm_tests(_STRING_EXPRESSIONS_TESTS)
 
     def test_conditionals(self) -> None:
-        tests = [
-            VmTestCase('if (true) { 10 }', 10),
-            VmTestCase('if (true) { 10 } else { 20 }', 10),
-            VmTestCase('if (false) { 10 } else { 20 }', 20),
-            VmTestCase('if (1) { 10 }', 10),
-            VmTestCase('if (1 < 2) { 10 }', 10),
-            VmTestCase('if (1 < 2) { 10 } else { 20 }', 10),
-            VmTestCase('if (1 > 2) { 10 } else { 20 }', 20),
-            VmTestCase('if (1 > 2) { 10 }', None),
-            VmTestCase('if (false) { 10 }', None),
-            VmTestCase('if ((if (false) { 10 })) { 10 } else { 20 }', 20),
-        ]
-
-        self.run_vm_tests(tests)
+        self.run_vm_tests(_CONDITIONALS_TESTS)
 
     def test_global_let_statement(self) -> None:
-        tests = [
-            VmTestCase('let one = 1; one', 1),
-            VmTestCase('let one = 1; let two = 2; one + two', 3),
-            VmTestCase('let one = 1; let two = one + one; one + two', 3),
-        ]
-
-        self.run_vm_tests(tests)
+        self.run_vm_tests(_GLOBAL_LET_STATEMENT_TESTS)
     
     def test_array_literals(self) -> None:
-        tests = [
-            VmTestCase('[]', []),
-            VmTestCase('[1, 2, 3]', [1, 2, 3]),
-            VmTestCase('[1 + 2, 3 * 4, 5 + 6]', [3, 12, 11]),
-        ]
-
-        self.run_vm_tests(tests)
+        self.run_vm_tests(_ARRAY_LITERALS_TESTS)
     
     def test_hash_literals(self) -> None:
-        tests = [
-            VmTestCase('{}', {}),
-            VmTestCase('{1: 2, 2: 3}', {1: 2, 2: 3}),
-            VmTestCase('{1 + 1: 2 * 2, 3 + 3: 4 * 4}', {2: 4, 6: 16}),
-        ]
-
-        self.run_vm_tests(tests)
+        self.run_vm_tests(_HASH_LITERALS_TESTS)
 
     def test_index_expressions(self) -> None:
-        tests = [
-            VmTestCase("[1, 2, 3][1]", 2),
-            VmTestCase("[1, 2, 3][0 + 2]", 3),
-            VmTestCase("[[1, 1, 1]][0][0]", 1),
-            VmTestCase("[][0]", None),
-            VmTestCase("[1, 2, 3][99]", None),
-            VmTestCase("[1][-1]", None),
-            VmTestCase("{1: 1, 2: 2}[1]", 1),
-            VmTestCase("{1: 1, 2: 2}[2]", 2),
-            VmTestCase("{1: 1}[0]", None),
-            VmTestCase("{}[0]", None),
-        ]
-
-        self.run_vm_tests(tests)
+        self.run_vm_tests(_INDEX_EXPRESSIONS_TESTS)
     
     def test_function_calls(self) -> None:
-        tests = [
-            VmTestCase("let fivePlusTen = fn() { 5 + 10 }; fivePlusTen();", 15)
-        ]
-
-        self.run_vm_tests(tests)
+        self.run_vm_tests(_FUNCTION_CALLS_TESTS)
     
     def test_function_calls_with_bindings(self):
-        tests = [
-            VmTestCase(input_string='''
-                        let one = fn() {let one = 1; one };
-                        one();
-                       ''',
-                       expected=1),
-            VmTestCase(input_string='''
-                        let oneAndTwo = fn() { let one = 1; let two = 2; one + two; };
-                        oneAndTwo();
-                       ''',
-                       expected=3),
-            VmTestCase(input_string='''
-                        let oneAndTwo = fn() { let one = 1; let two = 2; one + two; };
-                        let threeAndFour = fn() { let three = 3; let four = 4; three + four; };
-                        oneAndTwo() + threeAndFour();
-                       ''',
-                       expected=10),
-            VmTestCase(input_string='''
-                        let firstFoobar = fn() { let foobar = 50; foobar; };
-                        let secondFoobar = fn() { let foobar = 100; foobar; };
-                        firstFoobar() + secondFoobar();
-                       ''',
-                       expected=150),
-            VmTestCase(input_string='''
-                        let globalSeed = 50;
-                        let minusOne = fn() {
-                            let num = 1;
-                            globalSeed - num;
-                        }
-                        let minusTwo = fn() {
-                            let num = 2;
-                            globalSeed - num;
-                        }
-                        minusOne() + minusTwo();
-                       ''',
-                       expected=97),
-        ]
-
-        self.run_vm_tests(tests)
+        self.run_vm_tests(_FUNCTION_CALLS_WITH_BINDINGS_TESTS)
 
     def test_function_calls_with_arguments_and_bindings(self):
-        tests = [
-            VmTestCase(input_string='''
-                        let identity = fn(a) { a; };
-                        identity(4);
-                       ''',
-                       expected=4),
-            VmTestCase(input_string='''
-                        let sum = fn(a, b) { a + b; };
-                        sum(1, 2);
-                       ''',
-                       expected=3),
-            VmTestCase(input_string='''
-                        let sum = fn(a, b) {
-                            let c = a + b;
-                            c;
-                        };
-                        sum(1, 2);
-                       ''',
-                       expected=3),
-            VmTestCase(input_string='''
-                        let sum = fn(a, b) {
-                            let c = a + b;
-                            c;
-                        };
-                        sum(1, 2) + sum(3, 4);
-                       ''',
-                       expected=10),
-            VmTestCase(input_string='''
-                        let sum = fn(a, b) {
-                            let c = a + b;
-                            c;
-                        };
-                        let outer = fn() {
-                            sum(1, 2) + sum(3, 4);
-                        }
-                        outer();
-                       ''',
-                       expected=10),
-            VmTestCase(input_string='''
-                        let globalNum = 10;
-                       
-                        let sum = fn(a, b) {
-                            let c = a + b;
-                            c + globalNum;
-                        };
-                       
-                        let outer = fn() {
-                            sum(1, 2) + sum(3, 4) + globalNum;
-                        }
-                       
-                        outer() + globalNum;
-                       ''',
-                       expected=50),
-        ]
-
-        self.run_vm_tests(tests)
+        self.run_vm_tests(_FUNCTION_CALLS_WITH_ARGUMENTS_AND_BINDINGS_TESTS)
 
     def test_function_calls_with_wrong_arguments(self):
-        tests = [
-            VmTestCase(input_string='''fn() { 1; }(1);''',
-                       expected='wrong number of arguments: want=0, got=1'),
-            VmTestCase(input_string='''fn(a) { a; }();''',
-                       expected='wrong number of arguments: want=1, got=0'),
-            VmTestCase(input_string='''fn(a, b) { a + b; }(1);''',
-                       expected='wrong number of arguments: want=2, got=1'),
-        ]
-
-        for test in tests:
-            program = self.parse(test.input_string)
-            compiler = Compiler()
-            err = compiler.compile(program)
-            if err is not None:
-                self.fail(f'compiler error: {err}')
-            
-            vm = VirtualMachine(compiler.bytecode())
-            err = vm.run()
-            if err is None:
-                self.fail('expected VM error but resulted in none.')
-            
-            if str(err) != test.expected:
-                self.fail(f'wrong VM error: want={test.expected}, got={err}')
+        self.run_vm_error_tests(_FUNCTION_CALLS_WITH_WRONG_ARGUMENTS_TESTS)
 
     def test_first_class_functions(self):
-        tests = [
-            VmTestCase(
-                input_string='''
-                    let returnsOneReturner = fn() {
-                        let returnsOne = fn() { 1; };
-                        returnsOne;
-                    };
-                    returnsOneReturner()();
-                ''',
-                expected=1,
-            )
-        ]
-
-        self.run_vm_tests(tests)
+        self.run_vm_tests(_FIRST_CLASS_FUNCTIONS_TESTS)
     
     def test_builtin_functions(self):
-        tests = [
-            VmTestCase(input_string='''len("")''', expected=0),
-            VmTestCase(input_string='''len("four")''', expected=4),
-            VmTestCase(input_string='''len("hello world")''', expected=11),
-            VmTestCase(
-                input_string='''len(1)''',
-                expected=ErrorObject('argument to "len" not supported, got ObjectType.INTEGER_OBJ')
-            ),
-            VmTestCase(
-                input_string='''len("one", "two")''',
-                expected=ErrorObject("wrong number of arguments. got=2, want=1")
-            ),
-            VmTestCase(input_string='''len([1, 2, 3])''', expected=3),
-            VmTestCase(input_string='''len([])''', expected=0),
-            VmTestCase(input_string='''puts("hello", "world")''', expected=NULL),
-            VmTestCase(input_string='''first([1, 2, 3])''', expected=1),
-            VmTestCase(input_string='''first([])''', expected=NULL),
-            VmTestCase(
-                input_string='''first(1)''',
-                expected=ErrorObject('argument to "first" must be ARRAY, got ObjectType.INTEGER_OBJ')
-            ),
-            VmTestCase(input_string='''last([1, 2, 3])''', expected=3),
-            VmTestCase(input_string='''last([])''', expected=NULL),
-            VmTestCase(
-                input_string='''last(1)''',
-                expected=ErrorObject('argument to "last" must be ARRAY, got ObjectType.INTEGER_OBJ')
-            ),
-            VmTestCase(input_string='''rest([1, 2, 3])''', expected=[2, 3]),
-            VmTestCase(input_string='''rest([])''', expected=NULL),
-            VmTestCase(input_string='''push([], 1)''', expected=[1]),
-            VmTestCase(
-                input_string='''push(1, 1)''',
-                expected=ErrorObject('argument to "push" must be ARRAY, got ObjectType.INTEGER_OBJ')
-            ),
-        ]
-
-        self.run_vm_tests(tests)
+        self.run_vm_tests(_BUILTIN_FUNCTIONS_TESTS)
     
     def test_closures(self):
-        tests = [
-            VmTestCase(
-                input_string='''
-                    let newClosure = fn(a) {
-                        fn() { a; };
-                    };
-                    let closure = newClosure(99);
-                    closure();
-                    ''',
-                    expected=99),
-            VmTestCase(
-                input_string='''
-                    let newAdder = fn(a, b) {
-                        fn(c) { a + b + c; };
-                    };
-                    let adder = newAdder(1, 2);
-                    adder(8);
-                    ''',
-                    expected=11),
-            VmTestCase(
-                input_string='''
-                    let newAdder = fn(a, b) {
-                        let c = a + b;
-                        fn(d) { c + d; };
-                    };
-                    let adder = newAdder(1, 2);
-                    adder(8);
-                    ''',
-                    expected=11),
-            VmTestCase(
-                input_string='''
-                    let newAdderOuter = fn(a, b) {
-                        let c = a + b;
-                        fn(d) {
-                            let e = d + c;
-                            fn(f) { e + f; };
-                        };
-                    };
-                    let newAdderInner = newAdderOuter(1, 2)
-                    let adder = newAdderInner(3);
-                    adder(8);
-                    ''',
-                    expected=14),
-            VmTestCase(
-                input_string='''
-                    let a = 1;
-                    let newAdderOuter = fn(b) {
-                        fn(c) {
-                            fn(d) { a + b + c + d };
-                        };
-                    };
-                    let newAdderInner = newAdderOuter(2)
-                    let adder = newAdderInner(3);
-                    adder(8);
-                    ''',
-                    expected=14),
-            VmTestCase(
-                input_string='''
-                    let newClosure = fn(a, b) {
-                        let one = fn() { a; };
-                        let two = fn() { b; };
-                        fn() { one() + two(); };
-                    };
-                    let closure = newClosure(9, 90);
-                    closure();
-                    ''',
-                    expected=99),
-        ]
-
-        self.run_vm_tests(tests)
+        self.run_vm_tests(_CLOSURES_TESTS)
 
     def test_recursive_functions(self):
-        tests = [
-            VmTestCase(
-                input_string='''
-                    let countDown = fn(x) {
-                        if (x == 0) {
-                            return 0;
-                        } else {
-                            countDown(x - 1);
-                        }
-                    };
-                    countDown(1);
-                    ''',
-                    expected=0),
-            VmTestCase(
-                input_string='''
-                    let countDown = fn(x) {
-                        if (x == 0) {
-                            return 0;
-                        } else {
-                            countDown(x - 1);
-                        }
-                    };
-                    let wrapper = fn() {
-                        countDown(1);
-                    };
-                    wrapper();
-                    ''',
-                    expected=0),
-            VmTestCase(
-                input_string='''
-                    let wrapper = fn() {
-                        let countDown = fn(x) {
-                            if (x == 0) {
-                                return 0;
-                            } else {
-                                countDown(x - 1);
-                            }
-                        };
-                        countDown(1);
-                    };
-                    wrapper();
-                    ''',
-                    expected=0),
-        ]
-
-        self.run_vm_tests(tests)
+        self.run_vm_tests(_RECURSIVE_FUNCTIONS_TESTS)
     
     def test_recursive_fibonacci(self):
-        tests = [
-            VmTestCase(
-                input_string='''
-                    let fibonacci = fn(x) {
-                        if (x == 0) {
-                            return 0;
-                        } else {
-                            if (x == 1) {
-                                return 1;
-                            } else {
-                                fibonacci(x - 1) + fibonacci(x - 2);
-                            }
-                        }
-                    };
-
-                    fibonacci(15);
-                    ''',
-                    expected=610),
+        self.run_vm_tests(_RECURSIVE_FIBONACCI_TESTS)
+
+    def test_fuse_pops(self):
+        instructions = code.Instructions(b''.join([
+            code.make(code.Opcode.OpConstant, 0),
+            code.make(code.Opcode.OpConstant, 1),
+            code.make(code.Opcode.OpAdd),
+            code.make(code.Opcode.OpPop),
+            code.make(code.Opcode.OpConstant, 2),
+            code.make(code.Opcode.OpConstant, 3),
+            code.make(code.Opcode.OpMul),
+            code.make(code.Opcode.OpReturnValue),
+        ]))
+
+        expected = code.Instructions(b''.join([
+            code.make(code.Opcode.OpConstant, 0),
+            code.make(code.Opcode.OpConstant, 1),
+            code.make(code.Opcode.OpAddPop),
+            code.make(code.Opcode.OpPop),
+            code.make(code.Opcode.OpConstant, 2),
+            code.make(code.Opcode.OpConstant, 3),
+            code.make(code.Opcode.OpMul),
+            code.make(code.Opcode.OpReturnValue),
+        ]))
+
+        self.assertEqual(str(fuse_pops(instructions)), str(expected))
+
+    def test_fused_expression_statements(self):
+        self.run_vm_tests(_FUSED_EXPRESSION_STATEMENTS_TESTS)
+
+    def test_reset(self):
+        vm = VirtualMachine(self.compile('let a = 1; let f = fn(x) { x * 10 }; f(a) + 2'))
+        self.assertIsNone(vm.run())
+        self.check_integer_object(12, vm.last_popped_stack_elem())
+
+        vm.reset(self.compile('let b = 5; [b, b - 1]'))
+        self.assertIsNone(vm.run())
+        self.check_expected_object([5, 4], vm.last_popped_stack_elem())
+
+    def test_reset_clears_globals(self):
+        vm = VirtualMachine(self.compile('let a = 99; a'))
+        self.assertIsNone(vm.run())
+
+        # y is only set in a branch that never runs, so it must not pick up the
+        # 99 the previous program left in the same global slot
+        vm.reset(self.compile('if (false) { let y = 1 }; y'))
+        self.assertIsNone(vm.run())
+        self.assertIsNone(vm.last_popped_stack_elem())
+
+    def test_stack_overflow_without_max_stack(self):
+        # Functions that didn't come from the compiler, so have max_stack unset
+        bytecode = self.compile('let f = fn(a, b, c) { 1 + f(a, b, c) }; f(1, 2, 3);')
+        constants = [
+            replace(c, max_stack=0) if type(c) is CompiledFunction else c
+            for c in bytecode.constants
         ]
 
-        self.run_vm_tests(tests)
+        vm = VirtualMachine(Bytecode(bytecode.instructions, constants))
+        err = vm.run()
+        self.assertIsNotNone(err)
+        self.assertEqual(str(err), 'stack overflow')
+
+    def test_decode(self):
+        instructions = code.Instructions(b''.join([
+            code.make(code.Opcode.OpTrue),
+            code.make(code.Opcode.OpJumpNotTruthy, 10),
+            code.make(code.Opcode.OpConstant, 0),
+            code.make(code.Opcode.OpJump, 11),
+            code.make(code.Opcode.OpNull),
+            code.make(code.Opcode.OpPop),
+            code.make(code.Opcode.OpClosure, 1, 2),
+        ]))
+
+        expected = [
+            (code.Opcode.OpTrue.value[0],          0, 0),
+            (code.Opcode.OpJumpNotTruthy.value[0], 4, 0),
+            (code.Opcode.OpConstant.value[0],      0, 0),
+            (code.Opcode.OpJump.value[0],          5, 0),
+            (code.Opcode.OpNull.value[0],          0, 0),
+            (code.Opcode.OpPop.value[0],           0, 0),
+            (code.Opcode.OpClosure.value[0],       1, 2),
+        ]
+
+        self.assertEqual(decode(instructions), expected)
+
+    def test_decode_large_program(self):
+        count = 20000
+        instructions = code.Instructions(b''.join(
+            code.make(code.Opcode.OpConstant, i) + code.make(code.Opcode.OpPop)
+            for i in range(count)
+        ))
+
+        decoded = decode(instructions)
+        self.assertEqual(len(decoded), 2 * count)
+        self.assertEqual(decoded[-2], (code.Opcode.OpConstant.value[0], count - 1, 0))
+        self.assertEqual(decoded[-1], (code.Opcode.OpPop.value[0], 0, 0))
 
 if __name__ == '__main__':
     unittest.main()